@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.alerts.alarm_client import AlarmClient
+from src.alerts.alarm_dispatcher import AlarmDispatcher
+from src.alerts.fake_alarm_controller import FakeAlarmController, STATUS_MODES
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+async def drive_client(client, num_sources, rate, duration):
+    latencies = []
+    outcomes = []
+
+    async def source(index):
+        interval = 1.0 / rate
+        deadline = time.monotonic() + duration
+        next_trigger = time.monotonic() + interval * index / num_sources
+        while next_trigger < deadline:
+            await asyncio.sleep(max(0.0, next_trigger - time.monotonic()))
+            started = time.monotonic()
+            outcomes.append(await client.trigger_alarm())
+            latencies.append(time.monotonic() - started)
+            next_trigger += interval
+
+    await asyncio.gather(*(source(i) for i in range(num_sources)))
+    return latencies, outcomes
+
+
+async def drive_dispatcher(dispatcher, num_sources, rate, duration):
+    interval = 1.0 / rate
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for i in range(num_sources):
+            dispatcher.submit(f"source-{i}")
+        await asyncio.sleep(interval)
+    while dispatcher.stats()['in_flight']:
+        await asyncio.sleep(0.01)
+
+
+async def run_scenario(args, latency):
+    controller = FakeAlarmController(latency=latency, latency_jitter=args.latency_jitter,
+                                     error_rate=args.error_rate, token_expiry=args.token_expiry,
+                                     status_mode=args.status_mode, latch_seconds=args.latch_seconds,
+                                     seed=args.seed)
+    await controller.start()
+    client = AlarmClient(controller.base_url, token_ttl=args.token_expiry, status_ttl=args.status_ttl)
+    try:
+        if args.dispatcher:
+            dispatcher = AlarmDispatcher(client, asyncio.get_running_loop(),
+                                         coalesce_window=args.coalesce_window, retry_base_delay=0.05,
+                                         retry_max_delay=1.0)
+            await drive_dispatcher(dispatcher, args.sources, args.rate, args.duration)
+            stats = dispatcher.stats()
+            alarms = stats['dispatched']
+            latencies = dispatcher.latencies()
+            succeeded = stats['succeeded']
+            await dispatcher.aclose()
+        else:
+            latencies, outcomes = await drive_client(client, args.sources, args.rate, args.duration)
+            alarms = len(outcomes)
+            succeeded = sum(outcomes)
+    finally:
+        await client.aclose()
+        await controller.stop()
+
+    requests = sum(controller.requests.values())
+    return {
+        'latency': latency,
+        'alarms': alarms,
+        'succeeded': succeeded,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'requests_per_alarm': requests / alarms if alarms else float('nan'),
+        'logins': controller.requests['/login'],
+        'connections': controller.connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the alarm path against a local fake controller")
+    parser.add_argument('--sources', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=1.0, help="triggers per second per source")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.0, 0.05, 0.5],
+                        help="controller latency in seconds; one scenario per value")
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--token-expiry', type=float, default=300.0)
+    parser.add_argument('--status-mode', choices=STATUS_MODES, default='latch')
+    parser.add_argument('--latch-seconds', type=float, default=5.0)
+    parser.add_argument('--status-ttl', type=float, default=0.0)
+    parser.add_argument('--dispatcher', action='store_true', help="drive the AlarmDispatcher instead of AlarmClient")
+    parser.add_argument('--coalesce-window', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    header = f"{'latency_s':>10} {'alarms':>8} {'ok':>8} {'p50_ms':>9} {'p99_ms':>9} {'req/alarm':>10} {'logins':>7} {'conns':>6}"
+    print(header)
+    for latency in args.latency:
+        result = asyncio.run(run_scenario(args, latency))
+        print(f"{result['latency']:>10.3f} {result['alarms']:>8} {result['succeeded']:>8} "
+              f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['requests_per_alarm']:>10.2f} "
+              f"{result['logins']:>7} {result['connections']:>6}")
+
+
+if __name__ == "__main__":
+    main()
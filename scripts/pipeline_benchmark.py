@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import threading
+import itertools
+import dataclasses
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+from src.pipeline.pipeline_builder import PipelineBuilder
+from src.utils.config_loader import ConfigLoader
+from src.utils.config_model import AppConfig
+
+
+class CountingAlarmSink:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, key: str):
+        self.submitted += 1
+
+
+class TimedProbe:
+    # Wraps the analytics probe to measure the Python CPU time it costs the streaming thread per batch.
+    def __init__(self, probe):
+        self.probe = probe
+        self.recording = False
+        self.batches = 0
+        self.cpu_seconds = 0.0
+
+    def nvanalytics_src_pad_buffer_probe(self, pad, info, u_data):
+        started = time.thread_time()
+        result = self.probe.nvanalytics_src_pad_buffer_probe(pad, info, u_data)
+        if self.recording:
+            self.cpu_seconds += time.thread_time() - started
+            self.batches += 1
+        return result
+
+
+class SourceRateProbe:
+    # Counts buffers arriving on each muxer sink pad, so the reported FPS is what every source delivered.
+    def __init__(self):
+        self.recording = False
+        self.counts = {}
+
+    def attach(self, source_manager):
+        for source_id, source in source_manager.sources.items():
+            self.counts[source_id] = 0
+            source.sinkpad.add_probe(Gst.PadProbeType.BUFFER, self.sink_probe, source_id)
+
+    def sink_probe(self, pad, info, source_id):
+        if self.recording:
+            self.counts[source_id] += 1
+        return Gst.PadProbeReturn.OK
+
+
+class LatencyProbe:
+    # Muxer output to sink input, matched by buffer PTS.
+    def __init__(self):
+        self.recording = False
+        self.pending = {}
+        self.latencies = []
+
+    def mux_probe(self, pad, info, u_data):
+        buffer = info.get_buffer()
+        if buffer:
+            if len(self.pending) > 1024:
+                self.pending.clear()
+            self.pending[buffer.pts] = time.perf_counter()
+        return Gst.PadProbeReturn.OK
+
+    def sink_probe(self, pad, info, u_data):
+        buffer = info.get_buffer()
+        if buffer:
+            started = self.pending.pop(buffer.pts, None)
+            if started is not None and self.recording:
+                self.latencies.append(time.perf_counter() - started)
+        return Gst.PadProbeReturn.OK
+
+
+def benchmark_config(base, num_sources: int, queue_buffers: int, leaky: int, latency_us: dict, args):
+    queues = {name: dict(settings) for name, settings in base.queues.items()}
+    queues['default'] = {**queues.get('default', {}), 'max-size-buffers': queue_buffers,
+                         'max-size-bytes': 0, 'max-size-time': 0, 'leaky': leaky}
+    return dataclasses.replace(
+        base,
+        profile=args.profile,
+        sources=[args.uri] * num_sources,
+        queues=queues,
+        pgie=dataclasses.replace(base.pgie, engine_cache_dir=None),
+        streammux=dataclasses.replace(base.streammux, max_sources=num_sources,
+                                      tuner=dataclasses.replace(base.streammux.tuner, enable=False)),
+        substitution=dataclasses.replace(base.substitution, profile='cpu', width=args.width, height=args.height,
+                                         framerate=args.fps,
+                                         latency_us={**base.substitution.latency_us, **latency_us}),
+        instrumentation=dataclasses.replace(base.instrumentation, enable=False),
+        watchdog=dataclasses.replace(base.watchdog, enable=False),
+        control=dataclasses.replace(base.control, enable=False),
+        storage=dataclasses.replace(base.storage, enable=False),
+    )
+
+
+def run_case(config, event_loop, warmup: float, duration: float) -> dict:
+    builder = PipelineBuilder(config, event_loop, alarm_sink=CountingAlarmSink())
+    probe = builder.analytics_probe = TimedProbe(builder.analytics_probe)
+    pipeline = builder.build_pipeline(config.sources)
+    latency = LatencyProbe()
+    rates = SourceRateProbe()
+    rates.attach(builder.source_manager)
+    pipeline.get_by_name('Stream-muxer').get_static_pad('src').add_probe(Gst.PadProbeType.BUFFER,
+                                                                         latency.mux_probe, 0)
+    last = pipeline.get_by_name(builder.config.profile_elements()[-1][1])
+    last.get_static_pad('sink').add_probe(Gst.PadProbeType.BUFFER, latency.sink_probe, 0)
+
+    loop = GLib.MainLoop()
+    errors = []
+    measured = {}
+
+    def on_message(bus, message):
+        if message.type == Gst.MessageType.ERROR:
+            err, debug = message.parse_error()
+            errors.append(f"{err}: {debug}")
+            loop.quit()
+        elif message.type == Gst.MessageType.EOS:
+            loop.quit()
+        return True
+
+    def start_recording():
+        probe.recording = latency.recording = rates.recording = True
+        measured['started'] = time.perf_counter()
+        measured['dropped'] = builder.handoff_queue.dropped
+        return False
+
+    bus = pipeline.get_bus()
+    bus.add_signal_watch()
+    bus.connect("message", on_message)
+    builder.analytics_worker.start()
+    pipeline.set_state(Gst.State.PLAYING)
+    GLib.timeout_add(int(warmup * 1000), start_recording)
+    GLib.timeout_add(int((warmup + duration) * 1000), loop.quit)
+    loop.run()
+    elapsed = time.perf_counter() - measured.get('started', time.perf_counter())
+    probe.recording = latency.recording = rates.recording = False
+    pipeline.set_state(Gst.State.NULL)
+    bus.remove_signal_watch()
+    builder.analytics_worker.stop()
+    if errors:
+        raise RuntimeError(errors[0])
+
+    latencies = np.asarray(latency.latencies)
+    source_fps = np.asarray(list(rates.counts.values()), dtype=float) / max(elapsed, 1e-9)
+    return {
+        'batches_per_second': probe.batches / elapsed if elapsed > 0 else 0.0,
+        'fps': float(source_fps.sum()),
+        'min_source_fps': float(source_fps.min()) if source_fps.size else 0.0,
+        'latency_mean': float(latencies.mean()) if latencies.size else 0.0,
+        'latency_p95': float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+        'probe_cpu_us': probe.cpu_seconds / max(probe.batches, 1) * 1e6,
+        'handoff_dropped': builder.handoff_queue.dropped - measured.get('dropped', 0),
+    }
+
+
+def parse_ints(value: str) -> list:
+    return [int(item) for item in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline topology on CPU stand-in elements "
+                                                 "across source counts and queue settings")
+    parser.add_argument('--config', help="pipeline_config.yaml to start from")
+    parser.add_argument('--profile', choices=('headless', 'display'), default='headless')
+    parser.add_argument('--sources', type=parse_ints, default=[1, 4, 8, 16])
+    parser.add_argument('--queue-buffers', type=parse_ints, default=[2, 8, 32])
+    parser.add_argument('--leaky', type=parse_ints, default=[0], help="queue leaky modes to sweep (0, 1, 2)")
+    parser.add_argument('--latency-us', default='',
+                        help="simulated per-element latency, e.g. nvinfer=8000,nvtracker=1500")
+    parser.add_argument('--uri', default='videotestsrc://', help="source URI; file:// URIs are decoded in software")
+    parser.add_argument('--width', type=int, default=320)
+    parser.add_argument('--height', type=int, default=240)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    latency_us = {}
+    for item in filter(None, args.latency_us.split(',')):
+        factory, _, value = item.partition('=')
+        latency_us[factory] = int(value)
+
+    Gst.init(None)
+    # Select the CPU profile before validation so the DeepStream config files need not exist on this machine.
+    raw = ConfigLoader.load_raw(ConfigLoader.resolve_path(args.config))
+    raw['pipeline'].setdefault('substitution', {})['profile'] = 'cpu'
+    base = AppConfig.from_dict(raw)
+    event_loop = asyncio.new_event_loop()
+    threading.Thread(target=event_loop.run_forever, daemon=True).start()
+
+    print(f"{'sources':>7} {'queue':>6} {'leaky':>5} {'fps':>8} {'min src':>8} {'batch/s':>8} {'lat ms':>7} "
+          f"{'p95 ms':>7} {'probe us':>9} {'dropped':>8}")
+    for num_sources, queue_buffers, leaky in itertools.product(args.sources, args.queue_buffers, args.leaky):
+        config = benchmark_config(base, num_sources, queue_buffers, leaky, latency_us, args)
+        try:
+            r = run_case(config, event_loop, args.warmup, args.duration)
+        except RuntimeError as e:
+            print(f"{num_sources:>7} {queue_buffers:>6} {leaky:>5} failed: {e}")
+            continue
+        print(f"{num_sources:>7} {queue_buffers:>6} {leaky:>5} {r['fps']:>8.1f} {r['min_source_fps']:>8.1f} "
+              f"{r['batches_per_second']:>8.1f} {r['latency_mean'] * 1000:>7.2f} {r['latency_p95'] * 1000:>7.2f} "
+              f"{r['probe_cpu_us']:>9.1f} {r['handoff_dropped']:>8}")
+    event_loop.call_soon_threadsafe(event_loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
+import os
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import yaml
+import numpy as np
 from screeninfo import get_monitors
 
+DEFAULT_CONFIG = "/home/developer/Workspace/logiscan_rlc/config/pipeline_config.yaml"
+SECTION_HEADER = re.compile(r'^\s*\[([^\]]+)\]\s*$')
+ROI_SECTION = re.compile(r'^roi-filtering-stream-(\d+)$')
+
 
 class RegionDrawer:
     def __init__(self, config_width, config_height):
@@ -9,6 +21,7 @@ class RegionDrawer:
         self.points = []
         self.config_width = config_width
         self.config_height = config_height
+        self.window_title = 'Frame'
 
     def draw_polygon(self, event, x, y, flags, param):
         if event == cv2.EVENT_LBUTTONDOWN:
@@ -16,7 +29,7 @@ class RegionDrawer:
             cv2.circle(param, (x, y), 3, (0, 255, 0), -1)
             if len(self.points) > 1:
                 cv2.line(param, self.points[-2], self.points[-1], (0, 255, 0), 2)
-            cv2.imshow('Frame', param)
+            cv2.imshow(self.window_title, param)
 
     def scale_polygon(self, frame_width, frame_height):
         scaled_points = []
@@ -31,12 +44,7 @@ class RegionDrawer:
         return roi_rf
 
     def capture_frame(self, video_source):
-        cap = cv2.VideoCapture(video_source)
-        ret, frame = cap.read()
-        cap.release()
-        if not ret:
-            raise RuntimeError("Failed to capture frame from video source")
-        return frame
+        return capture_frame(video_source)
 
     def resize_frame(self, frame):
         screen_width, screen_height = self.get_screen_size()
@@ -56,8 +64,33 @@ class RegionDrawer:
         monitor = get_monitors()[0]
         return monitor.width, monitor.height
 
+    def collect_polygons(self, frame, title):
+        # 'n' closes the current polygon and starts another, 'c' closes it and finishes, 's' skips the stream.
+        frame = self.resize_frame(frame)
+        polygons = []
+        self.points = []
+        self.window_title = title
+        cv2.namedWindow(title, cv2.WINDOW_NORMAL)
+        cv2.setMouseCallback(title, self.draw_polygon, frame)
+        while True:
+            cv2.imshow(title, frame)
+            key = cv2.waitKey(1) & 0xFF
+            if key in (ord('n'), ord('c')):
+                if len(self.points) > 2:
+                    cv2.line(frame, self.points[-1], self.points[0], (0, 255, 0), 2)
+                    polygons.append(self.points)
+                self.points = []
+                if key == ord('c'):
+                    break
+            elif key in (ord('s'), 27):
+                polygons = None
+                break
+        cv2.destroyAllWindows()
+        return polygons, frame.shape[:2]
+
     def process_frame(self, frame):
         frame = self.resize_frame(frame)
+        self.window_title = 'Frame'
         cv2.namedWindow('Frame', cv2.WINDOW_NORMAL)
         cv2.setMouseCallback('Frame', self.draw_polygon, frame)
 
@@ -87,6 +120,188 @@ class RegionDrawer:
             cv2.destroyAllWindows()
 
 
+def capture_frame(video_source, timeout=None):
+    params = []
+    if timeout:
+        timeout_ms = int(timeout * 1000)
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+    cap = cv2.VideoCapture(video_source, cv2.CAP_ANY, params)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        raise RuntimeError(f"Failed to capture frame from {video_source}")
+    return frame
+
+
+class SnapshotCache:
+    def __init__(self, directory, max_age):
+        self.directory = directory
+        self.max_age = max_age
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def path(self, stream_id):
+        return os.path.join(self.directory, f"stream-{stream_id}.png")
+
+    def fresh(self, stream_id, uri):
+        entry = self.index.get(str(stream_id))
+        return (entry is not None and entry['uri'] == uri and time.time() - entry['captured_at'] < self.max_age
+                and os.path.exists(self.path(stream_id)))
+
+    def load(self, stream_id):
+        return cv2.imread(self.path(stream_id))
+
+    def store(self, stream_id, uri, frame):
+        cv2.imwrite(self.path(stream_id), frame)
+        self.index[str(stream_id)] = {'uri': uri, 'captured_at': time.time()}
+
+    def save(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+def grab_snapshots(sources, cache, workers, timeout):
+    # Every camera connects at once, so the wall time is that of the slowest one.
+    def grab(stream_id, uri):
+        if cache.fresh(stream_id, uri):
+            frame = cache.load(stream_id)
+            # An unreadable or truncated snapshot is a cache miss.
+            if frame is not None:
+                return stream_id, frame, 'cached'
+        started = time.monotonic()
+        try:
+            frame = capture_frame(uri, timeout)
+        except RuntimeError as e:
+            return stream_id, None, str(e)
+        cache.store(stream_id, uri, frame)
+        return stream_id, frame, f"captured in {time.monotonic() - started:.1f}s"
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda item: grab(*item), sources.items()))
+    cache.save()
+    frames = {}
+    for stream_id, frame, status in results:
+        print(f"stream {stream_id}: {status}")
+        if frame is not None:
+            frames[stream_id] = frame
+    print(f"Snapshots for {len(frames)}/{len(sources)} streams in {time.monotonic() - started:.1f}s")
+    return frames
+
+
+def scale_polygons(polygons, display_sizes, config_width, config_height):
+    # polygons: list of point lists in display pixels; display_sizes: (height, width) of the frame each was drawn on.
+    lengths = [len(points) for points in polygons]
+    points = np.concatenate([np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons])
+    sizes = np.asarray(display_sizes, dtype=np.float64)[:, ::-1]
+    scales = np.repeat(np.array([config_width, config_height]) / sizes, lengths, axis=0)
+    scaled = np.rint(points * scales).astype(np.int64)
+    return np.split(scaled, np.cumsum(lengths)[:-1])
+
+
+def format_roi(points):
+    return ';'.join(f"{x};{y}" for x, y in points.tolist())
+
+
+def analytics_frame_size(lines, default_width, default_height):
+    section = None
+    size = {'config-width': default_width, 'config-height': default_height}
+    for line in lines:
+        header = SECTION_HEADER.match(line)
+        if header:
+            section = header.group(1)
+        elif section == 'property' and '=' in line:
+            key, value = (part.strip() for part in line.split('=', 1))
+            if key in size:
+                size[key] = int(value)
+    return size['config-width'], size['config-height']
+
+
+def write_roi_sections(path, stream_rois, label='RF'):
+    # Rewrites the roi-* keys of each calibrated [roi-filtering-stream-N] section, keeping every other line.
+    with open(path) as f:
+        lines = f.read().splitlines()
+
+    def roi_lines(stream_id):
+        return [f"roi-{label if i == 0 else f'{label}{i + 1}'}={roi}" for i, roi in enumerate(stream_rois[stream_id])]
+
+    # New sections inherit inverse-roi/class-id from the first existing stream section.
+    defaults = {'inverse-roi': '0', 'class-id': '-1'}
+    inherited = set()
+    output = []
+    written = set()
+    stream_id = None
+    in_roi_section = False
+    for line in lines:
+        header = SECTION_HEADER.match(line)
+        if header:
+            match = ROI_SECTION.match(header.group(1))
+            in_roi_section = match is not None
+            stream_id = int(match.group(1)) if match and int(match.group(1)) in stream_rois else None
+            output.append(line)
+            if stream_id is not None:
+                output.extend(roi_lines(stream_id))
+                written.add(stream_id)
+            continue
+        key, _, value = line.partition('=')
+        if in_roi_section and key.strip() in defaults and key.strip() not in inherited:
+            defaults[key.strip()] = value.strip()
+            inherited.add(key.strip())
+        if stream_id is not None and line.strip().startswith('roi-'):
+            continue
+        output.append(line)
+
+    for stream_id in sorted(set(stream_rois) - written):
+        if output and output[-1].strip():
+            output.append('')
+        output.extend([f"[roi-filtering-stream-{stream_id}]", "enable=1", *roi_lines(stream_id),
+                       *(f"{key}={value}" for key, value in defaults.items())])
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(output) + '\n')
+    os.replace(tmp_path, path)
+
+
+def calibrate(config, args):
+    pipeline = config['pipeline']
+    analytics_path = args.analytics_config or pipeline['nvdsanalytics']['config-file']
+    with open(analytics_path) as f:
+        config_width, config_height = analytics_frame_size(f.read().splitlines(), pipeline['streammux']['width'],
+                                                           pipeline['streammux']['height'])
+    sources = dict(enumerate(pipeline['sources']))
+    if args.streams:
+        sources = {stream_id: sources[stream_id] for stream_id in args.streams}
+
+    cache = SnapshotCache(args.snapshot_dir, args.max_age)
+    frames = grab_snapshots(sources, cache, args.workers, args.timeout)
+
+    drawn = []
+    for stream_id in sorted(frames):
+        region_drawer = RegionDrawer(config_width, config_height)
+        polygons, display_size = region_drawer.collect_polygons(frames[stream_id], f"stream {stream_id}")
+        if polygons:
+            drawn.extend((stream_id, polygon, display_size) for polygon in polygons)
+    if not drawn:
+        print("No polygons drawn; nothing written")
+        return
+
+    scaled = scale_polygons([polygon for _, polygon, _ in drawn], [size for _, _, size in drawn],
+                            config_width, config_height)
+    stream_rois = {}
+    for (stream_id, _, _), points in zip(drawn, scaled):
+        stream_rois.setdefault(stream_id, []).append(format_roi(points))
+    write_roi_sections(analytics_path, stream_rois, args.label)
+    print(f"Wrote {len(drawn)} polygons for streams {sorted(stream_rois)} to {analytics_path}")
+
+
 def load_config(config_path):
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
@@ -94,13 +309,33 @@ def load_config(config_path):
 
 
 if __name__ == "__main__":
-    config_path = "/home/developer/Workspace/logiscan_rlc/config/pipeline_config.yaml"
-    config = load_config(config_path)
+    parser = argparse.ArgumentParser(description="Draw nvdsanalytics ROI polygons on camera snapshots")
+    parser.add_argument('--config', default=DEFAULT_CONFIG)
+    parser.add_argument('--batch', action='store_true',
+                        help="calibrate every configured source and write the ROI sections back")
+    parser.add_argument('--streams', type=lambda value: [int(item) for item in value.split(',')],
+                        help="comma-separated stream ids to calibrate (default: all)")
+    parser.add_argument('--analytics-config', help="nvdsanalytics config to update (default: from --config)")
+    parser.add_argument('--snapshot-dir', default='snapshots')
+    parser.add_argument('--max-age', type=float, default=3600.0, help="seconds a cached snapshot stays fresh")
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=15.0, help="per-camera connect/read timeout in seconds")
+    parser.add_argument('--label', default='RF')
+    args = parser.parse_args()
 
-    config_width = config['pipeline']['streammux']['width']
-    config_height = config['pipeline']['streammux']['height']
-    source_uri = config['pipeline']['sources'][0]
+    config = load_config(args.config)
+    num_sources = len(config['pipeline']['sources'])
+    unknown = sorted(set(args.streams or ()) - set(range(num_sources)))
+    if unknown:
+        parser.error(f"--streams {','.join(map(str, unknown))} not configured; {args.config} has streams "
+                     f"0-{num_sources - 1}")
+    if args.batch:
+        calibrate(config, args)
+    else:
+        config_width = config['pipeline']['streammux']['width']
+        config_height = config['pipeline']['streammux']['height']
+        source_uri = config['pipeline']['sources'][0]
 
-    region_drawer = RegionDrawer(config_width, config_height)
-    frame = region_drawer.capture_frame(source_uri)
-    region_drawer.process_frame(frame)
+        region_drawer = RegionDrawer(config_width, config_height)
+        frame = region_drawer.capture_frame(source_uri)
+        region_drawer.process_frame(frame)
@@ -0,0 +1,121 @@
+import os
+import sys
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analytics.analytics_worker import AnalyticsWorker
+from src.analytics.fake_batch_meta import FakeBatchExtractor
+from src.analytics.inference_scheduler import InferenceIntervalScheduler
+from src.analytics.occupancy import RoiOccupancyEngine
+from src.analytics.recording import MetadataRecorder
+from src.analytics.replay import ReplayAlarmSink, ReplayEngine
+from src.analytics.track_state import TrackStateTable
+from src.utils.config_loader import ConfigLoader
+from src.utils.config_model import AnalyticsConfig, InferenceScheduleConfig, build_section
+
+
+def synthesize(path, seconds, num_sources, fps, max_objects, roi_probability, seed):
+    extractor = FakeBatchExtractor(num_sources=num_sources, max_objects_per_frame=max_objects,
+                                   roi_probability=roi_probability, seed=seed)
+    recorder = MetadataRecorder(path)
+    for i in range(int(seconds * fps)):
+        recorder.consume(extractor.extract(None, i / fps))
+    recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded analytics metadata through the occupancy decision logic")
+    parser.add_argument('recording')
+    parser.add_argument('--config', help="pipeline_config.yaml to take analytics settings from")
+    parser.add_argument('--threshold-count', type=float)
+    parser.add_argument('--check-interval', type=float)
+    parser.add_argument('--window-seconds', type=float)
+    parser.add_argument('--statistic', choices=('mean', 'min', 'max', 'percentile'))
+    parser.add_argument('--percentile', type=float)
+    parser.add_argument('--min-samples', type=int)
+    parser.add_argument('--track-state', action='store_true', default=None,
+                        help="also run the per-track dwell/unique-count rules")
+    parser.add_argument('--dwell-seconds', type=float)
+    parser.add_argument('--unique-window', type=float)
+    parser.add_argument('--unique-min', type=int)
+    parser.add_argument('--unique-max', type=int)
+    parser.add_argument('--inference-schedule', action='store_true',
+                        help="estimate the adaptive nvinfer interval over the recording")
+    parser.add_argument('--max-interval', type=int)
+    parser.add_argument('--quiet-seconds', type=float)
+    parser.add_argument('--synthesize', type=float, metavar='SECONDS',
+                        help="write a synthetic recording of this length to RECORDING first")
+    parser.add_argument('--sources', type=int, default=16)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--max-objects', type=int, default=150)
+    parser.add_argument('--roi-probability', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    analytics = {}
+    schedule = {}
+    if args.config:
+        pipeline = ConfigLoader.load_raw(args.config)['pipeline']
+        analytics = dict(pipeline.get('analytics', {}))
+        schedule = dict(pipeline.get('pgie', {}).get('schedule', {}))
+    for key in ('max-interval', 'quiet-seconds'):
+        value = getattr(args, key.replace('-', '_'))
+        if value is not None:
+            schedule[key] = value
+    for key in ('threshold-count', 'check-interval', 'window-seconds', 'statistic', 'percentile', 'min-samples',
+                'track-state', 'dwell-seconds', 'unique-window', 'unique-min', 'unique-max'):
+        value = getattr(args, key.replace('-', '_'))
+        if value is not None:
+            analytics[key] = value
+
+    if args.synthesize:
+        synthesize(args.recording, args.synthesize, args.sources, args.fps, args.max_objects,
+                   args.roi_probability, args.seed)
+
+    analytics = build_section(AnalyticsConfig, analytics, 'pipeline.analytics')
+    engine = RoiOccupancyEngine(
+        threshold_count=analytics.threshold_count,
+        window_seconds=analytics.window_seconds,
+        statistic=analytics.statistic,
+        percentile=analytics.percentile,
+        min_samples=analytics.min_samples,
+        history_size=analytics.history_size
+    )
+    track_state = None
+    if analytics.track_state:
+        track_state = TrackStateTable(
+            ttl_seconds=analytics.track_ttl,
+            dwell_seconds=analytics.dwell_seconds,
+            unique_window=analytics.unique_window,
+            unique_min=analytics.unique_min,
+            unique_max=analytics.unique_max,
+            max_tracks=analytics.max_tracks
+        )
+    consumers = []
+    if args.inference_schedule:
+        schedule = build_section(InferenceScheduleConfig, schedule, 'pipeline.pgie.schedule')
+        consumers.append(InferenceIntervalScheduler(
+            min_interval=schedule.min_interval,
+            max_interval=schedule.max_interval,
+            quiet_seconds=schedule.quiet_seconds,
+            count_delta=schedule.count_delta,
+            new_tracks=schedule.new_tracks
+        ))
+    sink = ReplayAlarmSink()
+    worker = AnalyticsWorker(None, engine, sink, check_interval_seconds=analytics.check_interval,
+                             consumers=consumers, track_state=track_state)
+    report = ReplayEngine(worker, sink).run(args.recording)
+    for consumer in consumers:
+        stats = consumer.stats()
+        report['inference_changes'] = stats['changes']
+        report['inferred_fraction'] = stats['inferred_batches'] / max(stats['batches'], 1)
+
+    for key, value in report.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline.streammux_tuner import ArrivalTrace, observed_batching, tune_streammux
+
+
+def synthesize(fps_list, seconds, jitter, seed):
+    rng = np.random.default_rng(seed)
+    times = []
+    sources = []
+    for source_id, fps in enumerate(fps_list):
+        arrivals = np.arange(rng.uniform(0, 1.0 / fps), seconds, 1.0 / fps)
+        arrivals = arrivals + rng.normal(0, jitter, arrivals.size)
+        times.append(arrivals)
+        sources.append(np.full(arrivals.size, source_id, dtype=np.int32))
+    return np.concatenate(times), np.concatenate(sources), np.empty(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune nvstreammux batch-size and batched-push-timeout "
+                                                 "against a recorded or synthetic frame arrival trace")
+    parser.add_argument('trace', nargs='?', help="arrival trace .npz written by the streammux tuner")
+    parser.add_argument('--synthesize', metavar='FPS', help="comma-separated per-source frame rates, e.g. 25,25,15,5")
+    parser.add_argument('--seconds', type=float, default=60.0)
+    parser.add_argument('--jitter-ms', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-sources', type=int, help="streammux slots (default: sources in the trace)")
+    parser.add_argument('--batch-size', type=int, help="batch-size the pipeline currently runs with")
+    parser.add_argument('--max-latency-ms', type=float, default=50.0)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.synthesize:
+        fps_list = [float(fps) for fps in args.synthesize.split(',')]
+        times, sources, pushes = synthesize(fps_list, args.seconds, args.jitter_ms / 1000, args.seed)
+    elif args.trace:
+        times, sources, pushes = ArrivalTrace.load(args.trace)
+    else:
+        parser.error("either a trace file or --synthesize is required")
+
+    max_sources = args.max_sources or int(np.unique(sources).size)
+    batch_size = args.batch_size or max_sources
+    result = tune_streammux(times, sources, max_sources, args.max_latency_ms / 1000, current_batch_size=batch_size)
+
+    print(f"{'source':>8} {'interval ms':>12}")
+    for source_id, interval in sorted(result['source_intervals'].items()):
+        print(f"{source_id:>8} {interval * 1000:>12.1f}")
+    if pushes.size:
+        observed = observed_batching(times, pushes, batch_size)
+        print(f"\nobserved: fill {observed['fill_ratio']:.3f}, frames/batch {observed['frames_per_batch']:.2f}, "
+              f"mux latency p95 {observed['latency_p95'] * 1000:.1f} ms")
+
+    print(f"\n{'batch':>6} {'timeout ms':>11} {'frames/batch':>13} {'fill':>6} {'mean ms':>8} {'p95 ms':>7} {'p99 ms':>7}")
+    ranked = sorted(result['candidates'], key=lambda r: (r['latency_p95'] > args.max_latency_ms / 1000,
+                                                         -r['frames_per_batch'], -r['fill_ratio']))
+    for r in ranked[:args.top]:
+        print(f"{r['batch_size']:>6} {r['timeout'] * 1000:>11.1f} {r['frames_per_batch']:>13.2f} "
+              f"{r['fill_ratio']:>6.3f} {r['latency_mean'] * 1000:>8.1f} {r['latency_p95'] * 1000:>7.1f} "
+              f"{r['latency_p99'] * 1000:>7.1f}")
+
+    for label in ('current_batch_size', 'recommended'):
+        r = result[label]
+        print(f"\n{label.replace('_', ' ')}: batch-size {r['batch_size']}, "
+              f"batched-push-timeout {int(r['timeout'] * 1e6)} us "
+              f"(fill {r['fill_ratio']:.3f}, p95 {r['latency_p95'] * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
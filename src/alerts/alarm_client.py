@@ -1,72 +1,135 @@
+import time
+import asyncio
 import httpx
 import logging
-from typing import Dict, Tuple, Optional
+from typing import Dict, Optional
 
 
 class AlarmClient:
-    def __init__(self, alarm_uri: str, username: str = "admin", password: str = "adminpass"):
+    def __init__(self, alarm_uri: str, username: str = "admin", password: str = "adminpass",
+                 timeout: float = 10.0, token_ttl: float = 300.0, status_ttl: float = 0.0,
+                 max_connections: int = 4):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._login_lock = None
+        self.update_settings(alarm_uri, username, password, token_ttl, status_ttl)
+
+    def update_settings(self, alarm_uri: str, username: str, password: str, token_ttl: float, status_ttl: float):
         self.base_url = alarm_uri.rstrip('/')
         self.auth = (username, password)
-        
+        self.token_ttl = token_ttl
+        self.status_ttl = status_ttl
+
         self.urls = {
             "login": f"{self.base_url}/login",
             "alarm": f"{self.base_url}/trigger_alarm",
             "status": f"{self.base_url}/alarm_status"
         }
-    
+
+        self._token = None
+        self._token_expiry = 0.0
+        self._status_active = False
+        self._status_expiry = 0.0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections,
+                                    keepalive_expiry=60.0)
+            )
+        return self._client
+
+    def _invalidate_token(self):
+        self._token = None
+        self._token_expiry = 0.0
+
     async def _get_access_token(self) -> Optional[str]:
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
+        if self._token and time.monotonic() < self._token_expiry:
+            return self._token
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            if self._token and time.monotonic() < self._token_expiry:
+                return self._token
+            try:
+                response = await self._get_client().post(
                     self.urls["login"],
                     auth=self.auth,
                     json={"key": "value"}
                 )
                 response.raise_for_status()
-                return response.json().get("access_token")
-        except httpx.HTTPError as e:
-            self.logger.error(f"Login failed: {e}")
-            return None
-    
+                payload = response.json()
+            except httpx.HTTPError as e:
+                self.logger.error("Login failed: %s", e)
+                return None
+            self._token = payload.get("access_token")
+            if self._token:
+                self._token_expiry = time.monotonic() + float(payload.get("expires_in", self.token_ttl))
+            return self._token
+
     def _get_auth_headers(self, token: str) -> Dict[str, str]:
         return {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
-    
-    async def _check_alarm_status(self, token: str) -> bool:
+
+    async def _request(self, method: str, url: str) -> httpx.Response:
+        for attempt in range(2):
+            token = await self._get_access_token()
+            if not token:
+                raise httpx.HTTPError("Failed to obtain access token")
+            response = await self._get_client().request(method, url, headers=self._get_auth_headers(token))
+            if response.status_code == httpx.codes.UNAUTHORIZED and attempt == 0:
+                self.logger.info("Access token rejected, logging in again")
+                self._invalidate_token()
+                continue
+            response.raise_for_status()
+            return response
+
+    async def _check_alarm_status(self) -> bool:
+        if self.status_ttl > 0 and time.monotonic() < self._status_expiry:
+            return self._status_active
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                headers = self._get_auth_headers(token)
-                response = await client.get(self.urls["status"], headers=headers)
-                response.raise_for_status()
-                return response.json().get("status") == "active"
+            response = await self._request("GET", self.urls["status"])
+            self._set_status(response.json().get("status") == "active")
+            return self._status_active
         except httpx.HTTPError as e:
-            self.logger.error(f"Failed to check alarm status: {e}")
+            self.logger.error("Failed to check alarm status: %s", e)
             return False
-    
-    async def _activate_alarm(self, token: str) -> bool:
+
+    async def _activate_alarm(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                headers = self._get_auth_headers(token)
-                response = await client.post(self.urls["alarm"], headers=headers)
-                response.raise_for_status()
-                self.logger.info("Alarm triggered successfully")
-                return True
+            await self._request("POST", self.urls["alarm"])
+            self._set_status(True)
+            self.logger.info("Alarm triggered successfully")
+            return True
         except httpx.HTTPError as e:
-            self.logger.error(f"Failed to trigger alarm: {e}")
+            self.logger.error("Failed to trigger alarm: %s", e)
             return False
-    
+
+    def _set_status(self, active: bool):
+        self._status_active = active
+        self._status_expiry = time.monotonic() + self.status_ttl
+
     async def trigger_alarm(self) -> bool:
         token = await self._get_access_token()
         if not token:
             self.logger.error("Cannot trigger alarm: Failed to obtain access token")
             return False
-        
-        is_active = await self._check_alarm_status(token)
+
+        is_active = await self._check_alarm_status()
         if is_active:
             self.logger.info("Alarm is already active, skipping trigger")
             return True
-        
-        return await self._activate_alarm(token)
\ No newline at end of file
+
+        return await self._activate_alarm()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._invalidate_token()
@@ -0,0 +1,92 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+
+
+class AlarmDispatcher:
+    def __init__(self, alarm_client, event_loop, coalesce_window: float = 30.0, max_retries: int = 5,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 60.0, latency_samples: int = 1024):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.alarm_client = alarm_client
+        self.event_loop = event_loop
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._in_flight = {}
+        self._last_dispatch = {}
+        self._latencies = deque(maxlen=latency_samples)
+        # stats() runs on the metrics HTTP thread while the event loop appends latencies.
+        self._latencies_lock = threading.Lock()
+        self.counters = {
+            'submitted': 0,
+            'coalesced': 0,
+            'dispatched': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'retries': 0,
+        }
+
+    def submit(self, key: str):
+        self.event_loop.call_soon_threadsafe(self._submit, key, time.monotonic())
+
+    def _submit(self, key: str, submitted_at: float):
+        self.counters['submitted'] += 1
+        last_dispatch = self._last_dispatch.get(key)
+        if key in self._in_flight or (last_dispatch is not None
+                                      and submitted_at - last_dispatch < self.coalesce_window):
+            self.counters['coalesced'] += 1
+            return
+        self._last_dispatch[key] = submitted_at
+        self.counters['dispatched'] += 1
+        self._in_flight[key] = self.event_loop.create_task(self._dispatch(key, submitted_at))
+
+    async def _dispatch(self, key: str, submitted_at: float):
+        try:
+            attempt = 0
+            while True:
+                try:
+                    succeeded = await self.alarm_client.trigger_alarm()
+                except Exception as e:
+                    self.logger.error("Alarm %s raised: %s", key, e)
+                    succeeded = False
+                if succeeded:
+                    self.counters['succeeded'] += 1
+                    with self._latencies_lock:
+                        self._latencies.append(time.monotonic() - submitted_at)
+                    return
+                if attempt >= self.max_retries:
+                    self.counters['failed'] += 1
+                    self.logger.error("Alarm %s failed after %d attempts", key, attempt + 1)
+                    return
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+                self.counters['retries'] += 1
+                attempt += 1
+                self.logger.warning("Alarm %s failed, retry %d/%d in %.1fs", key, attempt, self.max_retries, delay)
+                await asyncio.sleep(delay)
+        finally:
+            self._in_flight.pop(key, None)
+
+    def latencies(self) -> list:
+        with self._latencies_lock:
+            return list(self._latencies)
+
+    def stats(self) -> dict:
+        stats = dict(self.counters)
+        stats['in_flight'] = len(self._in_flight)
+        latencies = sorted(self.latencies())
+        if latencies:
+            stats['latency_p50'] = latencies[len(latencies) // 2]
+            stats['latency_p99'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            stats['latency_max'] = latencies[-1]
+        return stats
+
+    async def aclose(self):
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,136 @@
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import Counter
+
+from ..utils.exceptions import ConfigurationError
+
+STATUS_MODES = ('inactive', 'active', 'latch')
+
+
+class FakeAlarmController:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, token_expiry: float = 300.0, advertise_expiry: bool = True,
+                 status_mode: str = 'latch', latch_seconds: float = 5.0, seed=None):
+        if status_mode not in STATUS_MODES:
+            raise ConfigurationError(f"Unknown status mode '{status_mode}', expected one of {STATUS_MODES}")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.token_expiry = token_expiry
+        self.advertise_expiry = advertise_expiry
+        self.status_mode = status_mode
+        self.latch_seconds = latch_seconds
+
+        self.requests = Counter()
+        self.responses = Counter()
+        self.connections = 0
+        self._rng = random.Random(seed)
+        self._tokens = {}
+        self._next_token = 0
+        self._active_until = 0.0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info("Fake alarm controller listening on %s", self.base_url)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.responses.clear()
+        self.connections = 0
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length:
+                    await reader.readexactly(length)
+
+                status, body = await self._dispatch(method, path, headers)
+                payload = json.dumps(body).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, headers: dict):
+        self.requests[path] += 1
+        delay = self.latency + self._rng.uniform(0, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        status, body = self._route(method, path, headers)
+        self.responses[status] += 1
+        return status, body
+
+    def _route(self, method: str, path: str, headers: dict):
+        if self._rng.random() < self.error_rate:
+            return 500, {"detail": "injected failure"}
+        now = time.monotonic()
+
+        if path == "/login" and method == "POST":
+            self._next_token += 1
+            token = f"token-{self._next_token}"
+            self._tokens[token] = now + self.token_expiry
+            body = {"access_token": token}
+            if self.advertise_expiry:
+                body["expires_in"] = self.token_expiry
+            return 200, body
+
+        token = headers.get('authorization', '').removeprefix('Bearer ')
+        if self._tokens.get(token, 0.0) < now:
+            self._tokens.pop(token, None)
+            return 401, {"detail": "invalid or expired token"}
+
+        if path == "/alarm_status" and method == "GET":
+            if self.status_mode == 'active':
+                active = True
+            elif self.status_mode == 'latch':
+                active = now < self._active_until
+            else:
+                active = False
+            return 200, {"status": "active" if active else "inactive"}
+
+        if path == "/trigger_alarm" and method == "POST":
+            self._active_until = now + self.latch_seconds
+            return 200, {"status": "triggered"}
+
+        return 404, {"detail": "not found"}
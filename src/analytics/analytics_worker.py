@@ -0,0 +1,95 @@
+import logging
+import threading
+from collections import deque
+
+from .batch_meta import BatchRecords
+
+
+class AnalyticsWorker:
+    def __init__(self, handoff_queue, engine, alarm_dispatcher, check_interval_seconds=30, consumers=(),
+                 track_state=None, event_store=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.handoff_queue = handoff_queue
+        self.engine = engine
+        self.alarm_dispatcher = alarm_dispatcher
+        self.check_interval_seconds = check_interval_seconds
+        self.consumers = list(consumers)
+        self.track_state = track_state
+        self.event_store = event_store
+        self.last_check_time = None
+        self._last_dropped = 0
+        self._pending_resets = deque()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="analytics-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        self.handoff_queue.close()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        for consumer in self.consumers:
+            consumer.close()
+
+    def _run(self):
+        spare = BatchRecords()
+        while self._running:
+            records = self.handoff_queue.pop(spare, timeout=0.5)
+            if records is None:
+                continue
+            try:
+                self.process(records)
+            except Exception as e:
+                self.logger.exception("Analytics processing failed: %s", e)
+            spare = records
+
+    def reset_source(self, source_id: int):
+        # Applied on the worker thread so the engine is never mutated concurrently with update().
+        self._pending_resets.append(source_id)
+
+    def process(self, records: BatchRecords):
+        while self._pending_resets:
+            source_id = self._pending_resets.popleft()
+            self.engine.reset_source(source_id)
+            if self.track_state:
+                self.track_state.reset_source(source_id)
+        frames = records.frames()
+        now = records.timestamp
+        self.engine.update(frames['source_id'], frames['roi_count'], now)
+        if self.track_state:
+            self.track_state.update(records)
+        for consumer in self.consumers:
+            consumer.consume(records)
+        if self.last_check_time is None:
+            self.last_check_time = now
+        if now - self.last_check_time >= self.check_interval_seconds:
+            for source_id in self.engine.evaluate(now).tolist():
+                self.logger.warning("ROI occupancy below %s on source %d", self.engine.threshold_count, source_id)
+                self._raise_alarm(source_id, now)
+            if self.track_state:
+                for source_id, rule in self.track_state.evaluate(now):
+                    self.logger.warning("Track rule '%s' triggered on source %d", rule, source_id)
+                    self._raise_alarm(source_id, now, rule)
+            self._report_queue()
+            self.last_check_time = now
+
+    def _raise_alarm(self, source_id: int, now: float, rule: str = None):
+        if self.event_store:
+            self.event_store.record_alarm(now, source_id, rule)
+        self.alarm_dispatcher.submit(f"source-{source_id}-{rule}" if rule else f"source-{source_id}")
+
+    def _report_queue(self):
+        if self.handoff_queue is None:
+            return
+        dropped = self.handoff_queue.dropped
+        if dropped != self._last_dropped:
+            self.logger.warning("Analytics hand-off queue dropped %d batches (depth %d/%d)",
+                                dropped - self._last_dropped, self.handoff_queue.depth, self.handoff_queue.capacity)
+            self._last_dropped = dropped
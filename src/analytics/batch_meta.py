@@ -0,0 +1,176 @@
+import numpy as np
+
+from ..utils.exceptions import ConfigurationError
+
+ANALYTICS_OBJ_USER_META = "NVIDIA.DSANALYTICSOBJ.USER_META"
+
+
+class BatchRecords:
+    def __init__(self, max_frames: int = 16, max_objects: int = 2400):
+        self.timestamp = 0.0
+        self.num_frames = 0
+        self.num_objects = 0
+        self._allocate_frames(max_frames)
+        self._allocate_objects(max_objects)
+
+    def _allocate_frames(self, capacity: int):
+        self.frame_source_id = np.zeros(capacity, dtype=np.int32)
+        self.frame_num = np.zeros(capacity, dtype=np.int64)
+        self.frame_object_count = np.zeros(capacity, dtype=np.int32)
+        self.frame_roi_count = np.zeros(capacity, dtype=np.int32)
+
+    def _allocate_objects(self, capacity: int):
+        self.source_id = np.zeros(capacity, dtype=np.int32)
+        self.object_frame_num = np.zeros(capacity, dtype=np.int64)
+        self.object_id = np.zeros(capacity, dtype=np.uint64)
+        self.class_id = np.zeros(capacity, dtype=np.int32)
+        self.bbox = np.zeros((capacity, 4), dtype=np.float32)
+        self.roi_status = np.zeros(capacity, dtype=np.uint8)
+
+    @property
+    def frame_capacity(self) -> int:
+        return self.frame_source_id.shape[0]
+
+    @property
+    def object_capacity(self) -> int:
+        return self.source_id.shape[0]
+
+    def reserve(self, num_frames: int, num_objects: int):
+        if num_frames > self.frame_capacity:
+            old = self.frames()
+            self._allocate_frames(max(num_frames, self.frame_capacity * 2))
+            self._copy_frames(old, self.num_frames)
+        if num_objects > self.object_capacity:
+            old = self.objects()
+            self._allocate_objects(max(num_objects, self.object_capacity * 2))
+            self._copy_objects(old, self.num_objects)
+
+    def clear(self, timestamp: float = 0.0):
+        self.timestamp = timestamp
+        self.num_frames = 0
+        self.num_objects = 0
+
+    def frames(self) -> dict:
+        n = self.num_frames
+        return {
+            'source_id': self.frame_source_id[:n],
+            'frame_num': self.frame_num[:n],
+            'object_count': self.frame_object_count[:n],
+            'roi_count': self.frame_roi_count[:n],
+        }
+
+    def objects(self) -> dict:
+        n = self.num_objects
+        return {
+            'source_id': self.source_id[:n],
+            'frame_num': self.object_frame_num[:n],
+            'object_id': self.object_id[:n],
+            'class_id': self.class_id[:n],
+            'bbox': self.bbox[:n],
+            'roi_status': self.roi_status[:n],
+        }
+
+    def _copy_frames(self, frames: dict, n: int):
+        self.frame_source_id[:n] = frames['source_id']
+        self.frame_num[:n] = frames['frame_num']
+        self.frame_object_count[:n] = frames['object_count']
+        self.frame_roi_count[:n] = frames['roi_count']
+
+    def _copy_objects(self, objects: dict, n: int):
+        self.source_id[:n] = objects['source_id']
+        self.object_frame_num[:n] = objects['frame_num']
+        self.object_id[:n] = objects['object_id']
+        self.class_id[:n] = objects['class_id']
+        self.bbox[:n] = objects['bbox']
+        self.roi_status[:n] = objects['roi_status']
+
+    def copy_from(self, other: 'BatchRecords'):
+        self.reserve(other.num_frames, other.num_objects)
+        self.timestamp = other.timestamp
+        self.num_frames = other.num_frames
+        self.num_objects = other.num_objects
+        self._copy_frames(other.frames(), other.num_frames)
+        self._copy_objects(other.objects(), other.num_objects)
+
+
+class PydsBatchExtractor:
+    def __init__(self, records: BatchRecords = None):
+        import pyds
+        self._pyds = pyds
+        self.records = records or BatchRecords()
+        self.analytics_meta_type = pyds.nvds_get_user_meta_type(ANALYTICS_OBJ_USER_META)
+
+    def extract(self, gst_buffer, timestamp: float) -> BatchRecords:
+        pyds = self._pyds
+        frame_cast = pyds.NvDsFrameMeta.cast
+        object_cast = pyds.NvDsObjectMeta.cast
+        user_meta_cast = pyds.NvDsUserMeta.cast
+        analytics_cast = pyds.NvDsAnalyticsObjInfo.cast
+        analytics_meta_type = self.analytics_meta_type
+
+        records = self.records
+        records.clear(timestamp)
+        batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
+        records.reserve(batch_meta.num_frames_in_batch, 0)
+
+        n_frames = 0
+        n_objects = 0
+        l_frame = batch_meta.frame_meta_list
+        while l_frame:
+            try:
+                frame_meta = frame_cast(l_frame.data)
+            except StopIteration:
+                break
+            source_id = frame_meta.source_id
+            frame_num = frame_meta.frame_num
+            records.reserve(n_frames + 1, n_objects + frame_meta.num_obj_meta)
+            first_object = n_objects
+
+            l_obj = frame_meta.obj_meta_list
+            while l_obj:
+                try:
+                    obj_meta = object_cast(l_obj.data)
+                except StopIteration:
+                    break
+                in_roi = 0
+                l_user_meta = obj_meta.obj_user_meta_list
+                while l_user_meta:
+                    try:
+                        user_meta = user_meta_cast(l_user_meta.data)
+                    except StopIteration:
+                        break
+                    if user_meta.base_meta.meta_type == analytics_meta_type:
+                        if analytics_cast(user_meta.user_meta_data).roiStatus:
+                            in_roi = 1
+                        break
+                    l_user_meta = l_user_meta.next
+
+                rect = obj_meta.rect_params
+                records.source_id[n_objects] = source_id
+                records.object_frame_num[n_objects] = frame_num
+                records.object_id[n_objects] = obj_meta.object_id
+                records.class_id[n_objects] = obj_meta.class_id
+                records.bbox[n_objects] = (rect.left, rect.top, rect.width, rect.height)
+                records.roi_status[n_objects] = in_roi
+                n_objects += 1
+                l_obj = l_obj.next
+
+            records.frame_source_id[n_frames] = source_id
+            records.frame_num[n_frames] = frame_num
+            records.frame_object_count[n_frames] = n_objects - first_object
+            records.frame_roi_count[n_frames] = records.roi_status[first_object:n_objects].sum()
+            n_frames += 1
+            records.num_frames = n_frames
+            records.num_objects = n_objects
+            l_frame = l_frame.next
+
+        return records
+
+
+def create_batch_extractor(backend: str = 'pyds', **kwargs):
+    if backend == 'pyds':
+        return PydsBatchExtractor()
+    if backend == 'fake':
+        from .fake_batch_meta import FakeBatchExtractor
+        return FakeBatchExtractor(**kwargs)
+    raise ConfigurationError(f"Unknown metadata backend '{backend}'")
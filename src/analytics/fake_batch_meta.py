@@ -0,0 +1,61 @@
+import numpy as np
+
+from .batch_meta import BatchRecords
+
+
+class FakeBatchExtractor:
+    def __init__(self, num_sources: int = 4, max_objects_per_frame: int = 20, roi_probability: float = 0.5,
+                 track_lifetime: int = 300, width: int = 1920, height: int = 1080, seed=None,
+                 records: BatchRecords = None):
+        self.num_sources = num_sources
+        self.max_objects_per_frame = max_objects_per_frame
+        self.roi_probability = roi_probability
+        self.track_lifetime = track_lifetime
+        self.width = width
+        self.height = height
+        self.records = records or BatchRecords(num_sources, num_sources * max_objects_per_frame)
+        self._rng = np.random.default_rng(seed)
+        self._frame_nums = np.zeros(num_sources, dtype=np.int64)
+
+    def extract(self, gst_buffer=None, timestamp: float = 0.0) -> BatchRecords:
+        records = self.records
+        records.clear(timestamp)
+        num_sources = self.num_sources
+        counts = self._rng.integers(0, self.max_objects_per_frame + 1, size=num_sources)
+        total = int(counts.sum())
+        records.reserve(num_sources, total)
+
+        sources = np.arange(num_sources, dtype=np.int32)
+        frame_nums = self._frame_nums
+        object_sources = np.repeat(sources, counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        slot = np.arange(total) - first
+        generation = frame_nums[object_sources] // self.track_lifetime
+        object_ids = ((object_sources.astype(np.uint64) << np.uint64(32))
+                      + (generation * self.max_objects_per_frame + slot).astype(np.uint64))
+
+        # Boxes and ROI membership are derived from the track id so a track stays put over its lifetime.
+        seed = (object_ids * np.uint64(2654435761)) % np.uint64(1 << 31)
+        left = (seed % np.uint64(self.width - 200)).astype(np.float32)
+        top = ((seed >> np.uint64(8)) % np.uint64(self.height - 200)).astype(np.float32)
+        jitter = self._rng.normal(0.0, 2.0, size=(total, 2)).astype(np.float32)
+        in_roi = ((seed >> np.uint64(4)) % np.uint64(1000)).astype(np.float32) < self.roi_probability * 1000
+
+        records.source_id[:total] = object_sources
+        records.object_frame_num[:total] = frame_nums[object_sources]
+        records.object_id[:total] = object_ids
+        records.class_id[:total] = 0
+        records.bbox[:total, 0] = left + jitter[:, 0]
+        records.bbox[:total, 1] = top + jitter[:, 1]
+        records.bbox[:total, 2:] = 120.0
+        records.roi_status[:total] = in_roi
+
+        records.frame_source_id[:num_sources] = sources
+        records.frame_num[:num_sources] = frame_nums
+        records.frame_object_count[:num_sources] = counts
+        records.frame_roi_count[:num_sources] = np.bincount(object_sources, weights=in_roi,
+                                                            minlength=num_sources)
+        records.num_frames = num_sources
+        records.num_objects = total
+        self._frame_nums += 1
+        return records
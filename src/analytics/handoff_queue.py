@@ -0,0 +1,97 @@
+import threading
+
+from .batch_meta import BatchRecords
+from ..utils.exceptions import ConfigurationError
+
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+
+class BatchHandoffQueue:
+    def __init__(self, capacity: int = 64, overflow_policy: str = 'drop-oldest', block_timeout: float = 0.1,
+                 max_frames: int = 16, max_objects: int = 2400):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ConfigurationError(f"Unknown overflow policy '{overflow_policy}', expected one of {OVERFLOW_POLICIES}")
+        if capacity < 1:
+            raise ConfigurationError("Hand-off queue capacity must be positive")
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._slots = [BatchRecords(max_frames, max_objects) for _ in range(capacity)]
+        self._head = 0
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        self.pushed = 0
+        self.popped = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.high_watermark = 0
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.dropped_newest
+
+    def push(self, records: BatchRecords) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            if self._size == self.capacity:
+                if self.overflow_policy == 'block':
+                    self._not_full.wait_for(lambda: self._size < self.capacity or self._closed,
+                                            self.block_timeout)
+                if self._closed:
+                    return False
+                if self._size == self.capacity:
+                    if self.overflow_policy == 'drop-oldest':
+                        self._head = (self._head + 1) % self.capacity
+                        self._size -= 1
+                        self.dropped_oldest += 1
+                    else:
+                        self.dropped_newest += 1
+                        return False
+
+            self._slots[(self._head + self._size) % self.capacity].copy_from(records)
+            self._size += 1
+            self.pushed += 1
+            self.high_watermark = max(self.high_watermark, self._size)
+            self._not_empty.notify()
+            return True
+
+    def pop(self, spare: BatchRecords, timeout: float = None):
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._size > 0 or self._closed, timeout):
+                return None
+            if self._size == 0:
+                return None
+            records = self._slots[self._head]
+            self._slots[self._head] = spare
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self.popped += 1
+            self._not_full.notify()
+            return records
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'depth': self._size,
+                'capacity': self.capacity,
+                'high_watermark': self.high_watermark,
+                'pushed': self.pushed,
+                'popped': self.popped,
+                'dropped_oldest': self.dropped_oldest,
+                'dropped_newest': self.dropped_newest,
+            }
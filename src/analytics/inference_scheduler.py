@@ -0,0 +1,137 @@
+import logging
+
+import numpy as np
+
+from ..utils.exceptions import ConfigurationError
+
+KEY_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class InferenceIntervalScheduler:
+    def __init__(self, apply_interval=None, min_interval=0, max_interval=4, quiet_seconds=10.0,
+                 count_delta=1, new_tracks=1, max_sources=16, track_ttl=30.0):
+        if not 0 <= min_interval <= max_interval:
+            raise ConfigurationError("Inference interval bounds must satisfy 0 <= min-interval <= max-interval")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.apply_interval = apply_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.quiet_seconds = quiet_seconds
+        self.count_delta = count_delta
+        self.new_tracks = new_tracks
+        self.track_ttl = track_ttl
+
+        self.interval = min_interval
+        self._quiet_since = None
+        # Sorted (source, object_id) keys with their last-seen time; a track is new only if not seen within track_ttl.
+        self._seen_keys = np.empty(0, dtype=np.uint64)
+        self._seen_times = np.empty(0, dtype=np.float64)
+        self._object_counts = np.full(max_sources, -1, dtype=np.int64)
+        self._roi_counts = np.full(max_sources, -1, dtype=np.int64)
+        self._frames_until_inference = 0
+        self.counters = {'batches': 0, 'active_batches': 0, 'inferred_batches': 0, 'changes': 0}
+
+    def update_settings(self, min_interval: int, max_interval: int, quiet_seconds: float, count_delta: int,
+                        new_tracks: int):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.quiet_seconds = quiet_seconds
+        self.count_delta = count_delta
+        self.new_tracks = new_tracks
+        interval = min(max(self.interval, min_interval), max_interval)
+        if interval != self.interval:
+            self.interval = interval
+            if self.apply_interval:
+                self.apply_interval(interval)
+
+    def _grow(self, source_id: int):
+        rows = self._object_counts.size
+        while rows <= source_id:
+            rows *= 2
+        extra = rows - self._object_counts.size
+        self._object_counts = np.concatenate([self._object_counts, np.full(extra, -1, dtype=np.int64)])
+        self._roi_counts = np.concatenate([self._roi_counts, np.full(extra, -1, dtype=np.int64)])
+
+    def is_active(self, records) -> bool:
+        frames = records.frames()
+        objects = records.objects()
+
+        keys = objects['object_id'] ^ (objects['source_id'].astype(np.uint64) * KEY_MIX)
+        new_tracks = self._count_new_tracks(np.unique(keys), records.timestamp)
+
+        sources = frames['source_id'].astype(np.int64)
+        if sources.size and int(sources.max()) >= self._object_counts.size:
+            self._grow(int(sources.max()))
+        object_counts = frames['object_count'].astype(np.int64)
+        roi_counts = frames['roi_count'].astype(np.int64)
+        seen = self._object_counts[sources] >= 0
+        delta = np.maximum(np.abs(object_counts - self._object_counts[sources]),
+                           np.abs(roi_counts - self._roi_counts[sources]))
+        self._object_counts[sources] = object_counts
+        self._roi_counts[sources] = roi_counts
+        return new_tracks >= self.new_tracks or bool((seen & (delta >= self.count_delta)).any())
+
+    def _count_new_tracks(self, keys: np.ndarray, now: float) -> int:
+        # Keys embed the source, so sources missing from a partial batch keep their history untouched.
+        cutoff = now - self.track_ttl
+        found = recent = np.zeros(keys.size, dtype=bool)
+        if self._seen_keys.size:
+            positions = np.minimum(np.searchsorted(self._seen_keys, keys), self._seen_keys.size - 1)
+            found = self._seen_keys[positions] == keys
+            recent = found & (self._seen_times[positions] >= cutoff)
+            self._seen_times[positions[found]] = now
+
+        keep = self._seen_times >= cutoff
+        seen_keys = np.concatenate([self._seen_keys[keep], keys[~found]])
+        seen_times = np.concatenate([self._seen_times[keep], np.full(int((~found).sum()), now)])
+        if not found.all():
+            order = np.argsort(seen_keys, kind='stable')
+            seen_keys, seen_times = seen_keys[order], seen_times[order]
+        self._seen_keys, self._seen_times = seen_keys, seen_times
+        return int((~recent).sum())
+
+    def step(self, now: float, active: bool) -> int:
+        if active:
+            self._quiet_since = now
+            return self.min_interval
+        if self._quiet_since is None:
+            self._quiet_since = now
+        if now - self._quiet_since >= self.quiet_seconds and self.interval < self.max_interval:
+            self._quiet_since = now
+            return min(self.max_interval, max(1, self.interval * 2))
+        return self.interval
+
+    def consume(self, records):
+        self.counters['batches'] += 1
+        if self._frames_until_inference == 0:
+            self.counters['inferred_batches'] += 1
+            self._frames_until_inference = self.interval
+        else:
+            self._frames_until_inference -= 1
+
+        active = self.is_active(records)
+        if active:
+            self.counters['active_batches'] += 1
+        interval = self.step(records.timestamp, active)
+        if interval != self.interval:
+            self.logger.info("Inference interval %d -> %d (%s)", self.interval, interval,
+                             'activity' if active else 'quiet scene')
+            self.interval = interval
+            self.counters['changes'] += 1
+            self._frames_until_inference = min(self._frames_until_inference, interval)
+            if self.apply_interval:
+                self.apply_interval(interval)
+
+    def simulate(self, trace) -> list:
+        # trace: iterable of (timestamp, active) pairs; returns the interval in force after each step.
+        intervals = []
+        for now, active in trace:
+            self.interval = self.step(now, active)
+            intervals.append(self.interval)
+        return intervals
+
+    def stats(self) -> dict:
+        return {'interval': self.interval, **self.counters}
+
+    def close(self):
+        pass
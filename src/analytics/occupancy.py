@@ -0,0 +1,93 @@
+import numpy as np
+
+from ..utils.exceptions import ConfigurationError
+
+STATISTICS = ('mean', 'min', 'max', 'percentile')
+
+
+class RoiOccupancyEngine:
+    def __init__(self, threshold_count=4, window_seconds=30.0, statistic='mean', percentile=10.0,
+                 min_samples=1, history_size=2048, max_sources=16):
+        if statistic not in STATISTICS:
+            raise ConfigurationError(f"Unknown occupancy statistic '{statistic}', expected one of {STATISTICS}")
+        if history_size < 1 or max_sources < 1:
+            raise ConfigurationError("Occupancy history size and source count must be positive")
+        self.threshold_count = threshold_count
+        self.window_seconds = window_seconds
+        self.statistic = statistic
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.history_size = history_size
+
+        self._timestamps = np.full((max_sources, history_size), -np.inf, dtype=np.float64)
+        self._counts = np.zeros((max_sources, history_size), dtype=np.float32)
+        self._heads = np.zeros(max_sources, dtype=np.int64)
+
+    @property
+    def num_sources(self) -> int:
+        return self._timestamps.shape[0]
+
+    def _grow(self, source_id: int):
+        rows = self.num_sources
+        while rows <= source_id:
+            rows *= 2
+        extra = rows - self.num_sources
+        self._timestamps = np.vstack([self._timestamps,
+                                      np.full((extra, self.history_size), -np.inf, dtype=np.float64)])
+        self._counts = np.vstack([self._counts, np.zeros((extra, self.history_size), dtype=np.float32)])
+        self._heads = np.concatenate([self._heads, np.zeros(extra, dtype=np.int64)])
+
+    def update(self, source_ids, roi_counts, timestamps):
+        source_ids = np.asarray(source_ids, dtype=np.int64)
+        if source_ids.size == 0:
+            return
+        roi_counts = np.asarray(roi_counts, dtype=np.float32)
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), source_ids.shape)
+        top = int(source_ids.max())
+        if top >= self.num_sources:
+            self._grow(top)
+
+        if np.unique(source_ids).size == source_ids.size:
+            heads = self._heads[source_ids]
+            self._timestamps[source_ids, heads] = timestamps
+            self._counts[source_ids, heads] = roi_counts
+            self._heads[source_ids] = (heads + 1) % self.history_size
+            return
+
+        for source_id, count, timestamp in zip(source_ids.tolist(), roi_counts.tolist(), timestamps.tolist()):
+            head = self._heads[source_id]
+            self._timestamps[source_id, head] = timestamp
+            self._counts[source_id, head] = count
+            self._heads[source_id] = (head + 1) % self.history_size
+
+    def reset_source(self, source_id: int):
+        if source_id < self.num_sources:
+            self._timestamps[source_id] = -np.inf
+            self._counts[source_id] = 0
+            self._heads[source_id] = 0
+
+    def window_stats(self, now: float) -> dict:
+        mask = self._timestamps >= now - self.window_seconds
+        samples = mask.sum(axis=1)
+        active = np.flatnonzero(samples)
+        mask = mask[active]
+        counts = self._counts[active]
+        n = samples[active]
+
+        stats = {
+            'source_id': active,
+            'samples': n,
+            'mean': np.where(mask, counts, 0).sum(axis=1) / np.maximum(n, 1),
+            'min': np.where(mask, counts, np.inf).min(axis=1) if active.size else np.empty(0),
+            'max': np.where(mask, counts, -np.inf).max(axis=1) if active.size else np.empty(0),
+        }
+        if active.size:
+            stats['percentile'] = np.nanpercentile(np.where(mask, counts, np.nan), self.percentile, axis=1)
+        else:
+            stats['percentile'] = np.empty(0)
+        return stats
+
+    def evaluate(self, now: float) -> np.ndarray:
+        stats = self.window_stats(now)
+        below = (stats[self.statistic] < self.threshold_count) & (stats['samples'] >= self.min_samples)
+        return stats['source_id'][below]
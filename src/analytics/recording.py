@@ -0,0 +1,160 @@
+import struct
+import logging
+import numpy as np
+
+from .batch_meta import BatchRecords
+from ..utils.exceptions import ConfigurationError
+
+FILE_MAGIC = b'LSRLCREC'
+FILE_VERSION = 1
+CHUNK_MAGIC = b'CHNK'
+FILE_HEADER = struct.Struct('<8sI')
+CHUNK_HEADER = struct.Struct('<4sII')
+
+FRAME_COLUMNS = (
+    ('timestamp', np.dtype('<f8'), ()),
+    ('source_id', np.dtype('<i4'), ()),
+    ('frame_num', np.dtype('<i8'), ()),
+    ('object_count', np.dtype('<i4'), ()),
+    ('roi_count', np.dtype('<i4'), ()),
+)
+OBJECT_COLUMNS = (
+    ('timestamp', np.dtype('<f8'), ()),
+    ('source_id', np.dtype('<i4'), ()),
+    ('frame_num', np.dtype('<i8'), ()),
+    ('object_id', np.dtype('<u8'), ()),
+    ('class_id', np.dtype('<i4'), ()),
+    ('bbox', np.dtype('<f4'), (4,)),
+    ('roi_status', np.dtype('u1'), ()),
+)
+
+
+def _allocate(columns, capacity: int) -> dict:
+    return {name: np.zeros((capacity,) + shape, dtype=dtype) for name, dtype, shape in columns}
+
+
+class MetadataRecorder:
+    def __init__(self, path, chunk_frames: int = 4096, chunk_objects: int = 65536):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._frames = _allocate(FRAME_COLUMNS, chunk_frames)
+        self._objects = _allocate(OBJECT_COLUMNS, chunk_objects)
+        self._num_frames = 0
+        self._num_objects = 0
+        self.chunks_written = 0
+        self.frames_written = 0
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+
+    def consume(self, records: BatchRecords):
+        if self._file is None:
+            return
+        n_frames = records.num_frames
+        n_objects = records.num_objects
+        if (self._num_frames + n_frames > len(self._frames['timestamp'])
+                or self._num_objects + n_objects > len(self._objects['timestamp'])):
+            self.flush()
+            self._reserve(n_frames, n_objects)
+
+        f0, f1 = self._num_frames, self._num_frames + n_frames
+        frames = records.frames()
+        self._frames['timestamp'][f0:f1] = records.timestamp
+        for name in ('source_id', 'frame_num', 'object_count', 'roi_count'):
+            self._frames[name][f0:f1] = frames[name]
+
+        o0, o1 = self._num_objects, self._num_objects + n_objects
+        objects = records.objects()
+        self._objects['timestamp'][o0:o1] = records.timestamp
+        for name in ('source_id', 'frame_num', 'object_id', 'class_id', 'bbox', 'roi_status'):
+            self._objects[name][o0:o1] = objects[name]
+
+        self._num_frames = f1
+        self._num_objects = o1
+
+    def _reserve(self, n_frames: int, n_objects: int):
+        if n_frames > len(self._frames['timestamp']):
+            self._frames = _allocate(FRAME_COLUMNS, n_frames)
+        if n_objects > len(self._objects['timestamp']):
+            self._objects = _allocate(OBJECT_COLUMNS, n_objects)
+
+    def flush(self):
+        if self._file is None or self._num_frames == 0:
+            return
+        self._file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, self._num_frames, self._num_objects))
+        for name, _, _ in FRAME_COLUMNS:
+            self._file.write(self._frames[name][:self._num_frames].tobytes())
+        for name, _, _ in OBJECT_COLUMNS:
+            self._file.write(self._objects[name][:self._num_objects].tobytes())
+        self._file.flush()
+        self.chunks_written += 1
+        self.frames_written += self._num_frames
+        self._num_frames = 0
+        self._num_objects = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        self.logger.info("Recorded %d frames in %d chunks to %s", self.frames_written, self.chunks_written, self.path)
+
+
+class MetadataReader:
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version = FILE_HEADER.unpack_from(self._data, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ConfigurationError(f"{path} is not a metadata recording")
+
+    def chunks(self):
+        offset = FILE_HEADER.size
+        size = len(self._data)
+        while offset + CHUNK_HEADER.size <= size:
+            magic, n_frames, n_objects = CHUNK_HEADER.unpack_from(self._data, offset)
+            if magic != CHUNK_MAGIC:
+                raise ConfigurationError(f"Corrupt chunk header at offset {offset} in {self.path}")
+            offset += CHUNK_HEADER.size
+            frames, offset = self._columns(FRAME_COLUMNS, n_frames, offset)
+            objects, offset = self._columns(OBJECT_COLUMNS, n_objects, offset)
+            yield frames, objects
+
+    def _columns(self, columns, count: int, offset: int):
+        views = {}
+        for name, dtype, shape in columns:
+            items = count * int(np.prod(shape, dtype=np.int64))
+            nbytes = items * dtype.itemsize
+            if offset + nbytes > len(self._data):
+                raise ConfigurationError(f"Truncated chunk in {self.path}")
+            views[name] = np.frombuffer(self._data, dtype=dtype, count=items, offset=offset).reshape((count,) + shape)
+            offset += nbytes
+        return views, offset
+
+    def batches(self, records: BatchRecords = None):
+        records = records or BatchRecords()
+        for frames, objects in self.chunks():
+            frame_ts = frames['timestamp']
+            object_ts = objects['timestamp']
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(frame_ts)) + 1, [len(frame_ts)]))
+            object_bounds = np.searchsorted(object_ts, frame_ts[bounds[:-1]], side='left').tolist()
+            object_bounds.append(len(object_ts))
+            bounds = bounds.tolist()
+            for i in range(len(bounds) - 1):
+                f0, f1 = bounds[i], bounds[i + 1]
+                o0, o1 = object_bounds[i], object_bounds[i + 1]
+                records.reserve(f1 - f0, o1 - o0)
+                records.clear(float(frame_ts[f0]))
+                records.num_frames = f1 - f0
+                records.num_objects = o1 - o0
+                records.frame_source_id[:f1 - f0] = frames['source_id'][f0:f1]
+                records.frame_num[:f1 - f0] = frames['frame_num'][f0:f1]
+                records.frame_object_count[:f1 - f0] = frames['object_count'][f0:f1]
+                records.frame_roi_count[:f1 - f0] = frames['roi_count'][f0:f1]
+                records.source_id[:o1 - o0] = objects['source_id'][o0:o1]
+                records.object_frame_num[:o1 - o0] = objects['frame_num'][o0:o1]
+                records.object_id[:o1 - o0] = objects['object_id'][o0:o1]
+                records.class_id[:o1 - o0] = objects['class_id'][o0:o1]
+                records.bbox[:o1 - o0] = objects['bbox'][o0:o1]
+                records.roi_status[:o1 - o0] = objects['roi_status'][o0:o1]
+                yield records
@@ -0,0 +1,54 @@
+import time
+import numpy as np
+
+from .recording import MetadataReader
+
+
+class ReplayAlarmSink:
+    def __init__(self):
+        self.now = 0.0
+        self.alarms = []
+
+    def submit(self, key: str):
+        self.alarms.append((self.now, key))
+
+
+class ReplayEngine:
+    def __init__(self, worker, alarm_sink: ReplayAlarmSink):
+        self.worker = worker
+        self.alarm_sink = alarm_sink
+
+    def run(self, path) -> dict:
+        reader = MetadataReader(path)
+        latencies = []
+        frames = 0
+        batches = 0
+        first_timestamp = None
+        last_timestamp = None
+        started = time.perf_counter()
+        for records in reader.batches():
+            self.alarm_sink.now = records.timestamp
+            t0 = time.perf_counter()
+            self.worker.process(records)
+            latencies.append(time.perf_counter() - t0)
+            frames += records.num_frames
+            batches += 1
+            if first_timestamp is None:
+                first_timestamp = records.timestamp
+            last_timestamp = records.timestamp
+        elapsed = time.perf_counter() - started
+
+        latencies = np.asarray(latencies) * 1e6
+        recorded_seconds = (last_timestamp - first_timestamp) if batches else 0.0
+        return {
+            'batches': batches,
+            'frames': frames,
+            'alarms': len(self.alarm_sink.alarms),
+            'alarm_sources': sorted({key for _, key in self.alarm_sink.alarms}),
+            'elapsed_seconds': elapsed,
+            'frames_per_second': frames / elapsed if elapsed else 0.0,
+            'recorded_seconds': recorded_seconds,
+            'speedup': recorded_seconds / elapsed if elapsed else 0.0,
+            'decision_p50_us': float(np.percentile(latencies, 50)) if batches else 0.0,
+            'decision_p99_us': float(np.percentile(latencies, 99)) if batches else 0.0,
+        }
@@ -0,0 +1,202 @@
+import re
+import logging
+import configparser
+import numpy as np
+
+from .batch_meta import BatchRecords
+from ..utils.exceptions import ConfigurationError
+
+ROI_SECTION = re.compile(r'^roi-filtering-stream-(\d+)$')
+ANCHORS = ('bottom-center', 'center', 'top-left', 'bottom-left', 'bottom-right')
+
+
+class RoiZone:
+    __slots__ = ('stream_id', 'label', 'polygon', 'inverse', 'class_id')
+
+    def __init__(self, stream_id: int, label: str, polygon: np.ndarray, inverse: bool = False, class_id: int = -1):
+        self.stream_id = stream_id
+        self.label = label
+        self.polygon = polygon
+        self.inverse = inverse
+        self.class_id = class_id
+
+
+def parse_polygon(value: str) -> np.ndarray:
+    coords = [float(v) for v in value.replace(' ', '').strip(';').split(';') if v]
+    if len(coords) % 2 or len(coords) < 6:
+        raise ConfigurationError(f"ROI polygon '{value}' needs at least three x;y pairs")
+    polygon = np.asarray(coords, dtype=np.float32).reshape(-1, 2)
+    if len(polygon) > 3 and np.array_equal(polygon[0], polygon[-1]):
+        polygon = polygon[:-1]
+    return polygon
+
+
+def load_nvdsanalytics_zones(config_path):
+    parser = configparser.ConfigParser(strict=False)
+    parser.optionxform = str
+    if not parser.read(config_path):
+        raise ConfigurationError(f"Unable to read nvdsanalytics config {config_path}")
+
+    config_size = (parser.getfloat('property', 'config-width', fallback=1920.0),
+                   parser.getfloat('property', 'config-height', fallback=1080.0))
+    zones = []
+    for section in parser.sections():
+        match = ROI_SECTION.match(section)
+        if not match or not parser.getboolean(section, 'enable', fallback=True):
+            continue
+        inverse = parser.getboolean(section, 'inverse-roi', fallback=False)
+        class_id = parser.getint(section, 'class-id', fallback=-1)
+        for key, value in parser.items(section):
+            if key.startswith('roi-'):
+                zones.append(RoiZone(int(match.group(1)), key[len('roi-'):], parse_polygon(value), inverse, class_id))
+    return zones, config_size
+
+
+class RoiEngine:
+    def __init__(self, zones, config_size=(1920, 1080), frame_size=None, anchor: str = 'bottom-center'):
+        if anchor not in ANCHORS:
+            raise ConfigurationError(f"Unknown ROI anchor '{anchor}', expected one of {ANCHORS}")
+        self.anchor = anchor
+        self.zones = sorted(zones, key=lambda zone: zone.stream_id)
+        scale = np.ones(2, dtype=np.float32)
+        if frame_size is not None:
+            scale = np.asarray(frame_size, dtype=np.float32) / np.asarray(config_size, dtype=np.float32)
+        polygons = [zone.polygon * scale for zone in self.zones]
+        num_zones = len(polygons)
+
+        # Row num_zones is a sentinel zone with an empty bbox that pads the per-stream zone table.
+        self.zone_stream = np.asarray([zone.stream_id for zone in self.zones], dtype=np.int64)
+        self.zone_inverse = np.zeros(num_zones + 1, dtype=bool)
+        self.zone_inverse[:num_zones] = [zone.inverse for zone in self.zones]
+        self.zone_class = np.full(num_zones + 1, -1, dtype=np.int64)
+        self.zone_class[:num_zones] = [zone.class_id for zone in self.zones]
+        self.zone_bbox = np.tile(np.array([np.inf, np.inf, -np.inf, -np.inf], dtype=np.float32), (num_zones + 1, 1))
+        for i, polygon in enumerate(polygons):
+            self.zone_bbox[i] = (*polygon.min(axis=0), *polygon.max(axis=0))
+
+        # Edges are padded with NaN so that short polygons never register a crossing.
+        max_vertices = max((len(polygon) for polygon in polygons), default=1)
+        self.edge_x1 = np.full((num_zones + 1, max_vertices), np.nan, dtype=np.float32)
+        self.edge_y1 = np.full_like(self.edge_x1, np.nan)
+        self.edge_y2 = np.full_like(self.edge_x1, np.nan)
+        self.edge_inv_slope = np.zeros_like(self.edge_x1)
+        for i, polygon in enumerate(polygons):
+            n = len(polygon)
+            end = np.roll(polygon, -1, axis=0)
+            dy = end[:, 1] - polygon[:, 1]
+            self.edge_x1[i, :n] = polygon[:, 0]
+            self.edge_y1[i, :n] = polygon[:, 1]
+            self.edge_y2[i, :n] = end[:, 1]
+            self.edge_inv_slope[i, :n] = np.divide(end[:, 0] - polygon[:, 0], dy, out=np.zeros_like(dy),
+                                                   where=dy != 0)
+
+        num_streams = int(self.zone_stream.max()) + 1 if num_zones else 0
+        per_stream = np.bincount(self.zone_stream, minlength=num_streams) if num_zones else np.zeros(0, np.int64)
+        self.stream_zones = np.full((num_streams + 1, max(int(per_stream.max(initial=0)), 1)), num_zones,
+                                    dtype=np.int64)
+        for stream_id in range(num_streams):
+            zone_ids = np.flatnonzero(self.zone_stream == stream_id)
+            self.stream_zones[stream_id, :len(zone_ids)] = zone_ids
+
+    @classmethod
+    def from_config(cls, config_path, frame_size=None, anchor: str = 'bottom-center'):
+        zones, config_size = load_nvdsanalytics_zones(config_path)
+        return cls(zones, config_size, frame_size, anchor)
+
+    @property
+    def num_zones(self) -> int:
+        return len(self.zones)
+
+    def anchor_points(self, bbox: np.ndarray) -> np.ndarray:
+        left, top, width, height = bbox[:, 0], bbox[:, 1], bbox[:, 2], bbox[:, 3]
+        if self.anchor == 'bottom-center':
+            return np.stack([left + width / 2, top + height], axis=1)
+        if self.anchor == 'center':
+            return np.stack([left + width / 2, top + height / 2], axis=1)
+        if self.anchor == 'top-left':
+            return np.stack([left, top], axis=1)
+        if self.anchor == 'bottom-left':
+            return np.stack([left, top + height], axis=1)
+        return np.stack([left + width, top + height], axis=1)
+
+    def contains(self, source_ids: np.ndarray, points: np.ndarray, class_ids: np.ndarray = None):
+        sentinel_row = len(self.stream_zones) - 1
+        rows = np.asarray(source_ids, dtype=np.int64)
+        rows = np.where((rows >= 0) & (rows < sentinel_row), rows, sentinel_row)
+        zone_ids = self.stream_zones[rows]
+
+        px = points[:, 0:1]
+        py = points[:, 1:2]
+        bbox = self.zone_bbox[zone_ids]
+        in_bbox = (px >= bbox[..., 0]) & (px <= bbox[..., 2]) & (py >= bbox[..., 1]) & (py <= bbox[..., 3])
+        point_idx, slot = np.nonzero(in_bbox)
+        zone = zone_ids[point_idx, slot]
+
+        cx = px[point_idx]
+        cy = py[point_idx]
+        y1 = self.edge_y1[zone]
+        straddles = (y1 > cy) != (self.edge_y2[zone] > cy)
+        x_cross = self.edge_x1[zone] + (cy - y1) * self.edge_inv_slope[zone]
+        inside = np.count_nonzero(straddles & (cx < x_cross), axis=1) & 1 == 1
+
+        membership = np.zeros(zone_ids.shape, dtype=bool)
+        membership[point_idx[inside], slot[inside]] = True
+        membership ^= self.zone_inverse[zone_ids]
+        membership &= zone_ids < self.num_zones
+        if class_ids is not None:
+            zone_class = self.zone_class[zone_ids]
+            membership &= (zone_class < 0) | (zone_class == np.asarray(class_ids)[:, None])
+        return membership, zone_ids
+
+    def evaluate(self, records: BatchRecords):
+        objects = records.objects()
+        points = self.anchor_points(objects['bbox'])
+        membership, zone_ids = self.contains(objects['source_id'], points, objects['class_id'])
+        zone_counts = np.bincount(zone_ids[membership], minlength=self.num_zones + 1)[:self.num_zones]
+        return membership, zone_ids, zone_counts
+
+
+class RoiZoneMonitor:
+    def __init__(self, roi_engine: RoiEngine, report_interval_seconds: float = 60.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.roi_engine = roi_engine
+        self.report_interval_seconds = report_interval_seconds
+        self.zone_counts = np.zeros(roi_engine.num_zones, dtype=np.int64)
+        self.frames = 0
+        self.objects = 0
+        self.mismatches = 0
+        self._last_report = None
+
+    def set_engine(self, roi_engine: RoiEngine):
+        self.roi_engine = roi_engine
+        self.zone_counts = np.zeros(roi_engine.num_zones, dtype=np.int64)
+
+    def consume(self, records: BatchRecords):
+        membership, _, counts = self.roi_engine.evaluate(records)
+        if counts.shape != self.zone_counts.shape:
+            return
+        self.zone_counts += counts
+        self.frames += records.num_frames
+        self.objects += records.num_objects
+        in_stream_zone = membership.any(axis=1)
+        self.mismatches += int(np.count_nonzero(in_stream_zone != records.objects()['roi_status'].astype(bool)))
+
+        if self._last_report is None:
+            self._last_report = records.timestamp
+        if records.timestamp - self._last_report >= self.report_interval_seconds:
+            self.report()
+            self._last_report = records.timestamp
+
+    def report(self):
+        frames = max(self.frames, 1)
+        summary = ', '.join(f"{zone.stream_id}/{zone.label}={count / frames:.2f}"
+                            for zone, count in zip(self.roi_engine.zones, self.zone_counts.tolist()))
+        self.logger.info("Mean objects per frame by zone: %s; nvdsanalytics disagreements %d/%d", summary,
+                         self.mismatches, self.objects)
+        self.zone_counts[:] = 0
+        self.frames = 0
+        self.objects = 0
+        self.mismatches = 0
+
+    def close(self):
+        pass
@@ -0,0 +1,222 @@
+import numpy as np
+
+from ..utils.exceptions import ConfigurationError
+
+ALARM_RULES = ('dwell', 'unique-min', 'unique-max')
+
+
+class TrackStateTable:
+    def __init__(self, ttl_seconds=30.0, dwell_seconds=None, unique_window=300.0, unique_min=None,
+                 unique_max=None, capacity=4096, max_tracks=65536, entry_history=4096, max_sources=16,
+                 evict_interval=1.0):
+        if capacity < 1 or max_tracks < capacity or entry_history < 1:
+            raise ConfigurationError("Track table capacity must be positive and no larger than max_tracks")
+        self.ttl_seconds = ttl_seconds
+        self.dwell_seconds = dwell_seconds
+        self.unique_window = unique_window
+        self.unique_min = unique_min
+        self.unique_max = unique_max
+        self.max_tracks = max_tracks
+        self.entry_history = entry_history
+        self.evict_interval = evict_interval
+
+        self._index = {}
+        self._free = []
+        self._allocate_columns(capacity)
+        self._entry_times = np.full((max_sources, entry_history), -np.inf, dtype=np.float64)
+        self._entry_heads = np.zeros(max_sources, dtype=np.int64)
+        self._source_started = np.full(max_sources, np.inf, dtype=np.float64)
+        self._last_eviction = -np.inf
+        self.counters = {'tracks': 0, 'entries': 0, 'exits': 0, 'evicted': 0, 'forced_evictions': 0}
+
+    def _allocate_columns(self, capacity: int):
+        old = getattr(self, '_source_id', np.empty(0)).size
+        columns = {
+            '_source_id': (np.int32, 0),
+            '_object_id': (np.uint64, 0),
+            '_first_seen': (np.float64, 0.0),
+            '_last_seen': (np.float64, 0.0),
+            '_entered_at': (np.float64, 0.0),
+            '_roi_seconds': (np.float64, 0.0),
+            '_entries': (np.int32, 0),
+            '_exits': (np.int32, 0),
+            '_in_roi': (np.bool_, False),
+            '_active': (np.bool_, False),
+        }
+        for name, (dtype, fill) in columns.items():
+            column = np.full(capacity, fill, dtype=dtype)
+            if old:
+                column[:old] = getattr(self, name)
+            setattr(self, name, column)
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return self._source_id.size
+
+    @property
+    def num_tracks(self) -> int:
+        return len(self._index)
+
+    @property
+    def num_sources(self) -> int:
+        return self._entry_times.shape[0]
+
+    def _grow_sources(self, source_id: int):
+        rows = self.num_sources
+        while rows <= source_id:
+            rows *= 2
+        extra = rows - self.num_sources
+        self._entry_times = np.vstack([self._entry_times,
+                                       np.full((extra, self.entry_history), -np.inf, dtype=np.float64)])
+        self._entry_heads = np.concatenate([self._entry_heads, np.zeros(extra, dtype=np.int64)])
+        self._source_started = np.concatenate([self._source_started, np.full(extra, np.inf)])
+
+    def _take_slot(self) -> int:
+        if not self._free:
+            if self.capacity < self.max_tracks:
+                self._allocate_columns(min(self.capacity * 2, self.max_tracks))
+            else:
+                # Table is full of live tracks: drop the least recently seen one.
+                active = np.flatnonzero(self._active)
+                self._release(active[[int(np.argmin(self._last_seen[active]))]])
+                self.counters['forced_evictions'] += 1
+        return self._free.pop()
+
+    def _allocate(self, positions: np.ndarray, keys: list, now: float) -> np.ndarray:
+        slots = np.empty(positions.size, dtype=np.int64)
+        for i, position in enumerate(positions.tolist()):
+            key = keys[position]
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._take_slot()
+                self._index[key] = slot
+                self._source_id[slot], self._object_id[slot] = key
+                self._first_seen[slot] = self._last_seen[slot] = now
+                self._roi_seconds[slot] = 0.0
+                self._entries[slot] = self._exits[slot] = 0
+                self._in_roi[slot] = False
+                self._active[slot] = True
+                self.counters['tracks'] += 1
+            slots[i] = slot
+        return slots
+
+    def update(self, records):
+        now = records.timestamp
+        if now - self._last_eviction >= self.evict_interval:
+            self.evict(now)
+            self._last_eviction = now
+        if records.num_objects:
+            objects = records.objects()
+            sources = objects['source_id'].astype(np.int64)
+            inside = objects['roi_status'] != 0
+            top = int(sources.max())
+            if top >= self.num_sources:
+                self._grow_sources(top)
+            started = np.unique(sources)
+            self._source_started[started] = np.minimum(self._source_started[started], now)
+
+            keys = list(zip(sources.tolist(), objects['object_id'].tolist()))
+            index = self._index
+            slots = np.fromiter((index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+            new = np.flatnonzero(slots < 0)
+            previous = self._last_seen[slots]
+            # Touch known tracks first so a forced eviction during allocation cannot pick one of them.
+            self._last_seen[slots[slots >= 0]] = now
+            if new.size:
+                slots[new] = self._allocate(new, keys, now)
+
+            was_inside = self._in_roi[slots]
+            np.add.at(self._roi_seconds, slots[was_inside], now - previous[was_inside])
+            entered = inside & ~was_inside
+            exited = was_inside & ~inside
+            np.add.at(self._entries, slots[entered], 1)
+            np.add.at(self._exits, slots[exited], 1)
+            self._entered_at[slots[entered]] = now
+            self._last_seen[slots] = now
+            self._in_roi[slots] = inside
+            self.counters['entries'] += int(entered.sum())
+            self.counters['exits'] += int(exited.sum())
+
+            first_entry = entered & (self._entries[slots] == 1)
+            for source_id in sources[first_entry].tolist():
+                head = self._entry_heads[source_id]
+                self._entry_times[source_id, head] = now
+                self._entry_heads[source_id] = (head + 1) % self.entry_history
+
+    def consume(self, records):
+        self.update(records)
+
+    def _release(self, slots: np.ndarray):
+        for source_id, object_id in zip(self._source_id[slots].tolist(), self._object_id[slots].tolist()):
+            del self._index[(source_id, object_id)]
+        self.counters['exits'] += int(self._in_roi[slots].sum())
+        self.counters['evicted'] += slots.size
+        self._active[slots] = False
+        self._in_roi[slots] = False
+        self._free.extend(slots.tolist())
+
+    def evict(self, now: float):
+        stale = np.flatnonzero(self._active & (self._last_seen < now - self.ttl_seconds))
+        if stale.size:
+            self._release(stale)
+
+    def reset_source(self, source_id: int):
+        self._release(np.flatnonzero(self._active & (self._source_id == source_id)))
+        if source_id < self.num_sources:
+            self._entry_times[source_id] = -np.inf
+            self._entry_heads[source_id] = 0
+            self._source_started[source_id] = np.inf
+
+    def track(self, source_id: int, object_id: int, now: float = None):
+        slot = self._index.get((source_id, object_id))
+        if slot is None:
+            return None
+        in_roi = bool(self._in_roi[slot])
+        roi_seconds = self._roi_seconds[slot]
+        if in_roi and now is not None:
+            roi_seconds += now - self._last_seen[slot]
+        return {
+            'source_id': source_id,
+            'object_id': object_id,
+            'first_seen': float(self._first_seen[slot]),
+            'last_seen': float(self._last_seen[slot]),
+            'in_roi': in_roi,
+            'entered_at': float(self._entered_at[slot]) if in_roi else None,
+            'roi_seconds': float(roi_seconds),
+            'entries': int(self._entries[slot]),
+            'exits': int(self._exits[slot]),
+        }
+
+    def dwell_times(self, now: float) -> np.ndarray:
+        dwell = np.zeros(self.num_sources, dtype=np.float64)
+        inside = np.flatnonzero(self._in_roi)
+        np.maximum.at(dwell, self._source_id[inside], now - self._entered_at[inside])
+        return dwell
+
+    def unique_counts(self, now: float, window: float = None) -> np.ndarray:
+        window = self.unique_window if window is None else window
+        return (self._entry_times >= now - window).sum(axis=1)
+
+    def evaluate(self, now: float) -> list:
+        alarms = []
+        if self.dwell_seconds:
+            for source_id in np.flatnonzero(self.dwell_times(now) > self.dwell_seconds).tolist():
+                alarms.append((source_id, 'dwell'))
+        if self.unique_min is not None or self.unique_max is not None:
+            counts = self.unique_counts(now)
+            # A source must have been observed for a full window before its count means anything.
+            warm = self._source_started <= now - self.unique_window
+            if self.unique_min is not None:
+                for source_id in np.flatnonzero(warm & (counts < self.unique_min)).tolist():
+                    alarms.append((source_id, 'unique-min'))
+            if self.unique_max is not None:
+                for source_id in np.flatnonzero(counts > self.unique_max).tolist():
+                    alarms.append((source_id, 'unique-max'))
+        return alarms
+
+    def stats(self) -> dict:
+        return {'active_tracks': self.num_tracks, 'capacity': self.capacity, **self.counters}
+
+    def close(self):
+        pass
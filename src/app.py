@@ -1,62 +1,142 @@
 import os
 import sys
+import time
 import signal
 import logging
-from pathlib import Path
+import argparse
+from contextlib import contextmanager
 import asyncio
 import threading
 from queue import Queue
 
-import gi
-gi.require_version('Gst', '1.0')
-from gi.repository import Gst, GLib
-
-from .utils.config_loader import ConfigLoader
+from .utils.config_loader import ConfigLoader, CONFIG_ENV_VAR
+from .utils.config_watcher import ConfigWatcher
 from .utils.logger import setup_logging
-from .pipeline.pipeline_builder import PipelineBuilder
 from .utils.exceptions import PipelineError
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-class LogiScanRLCApp:
+class StartupTimer:
     def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.started = time.monotonic()
+        self.phases = {}
+        self.milestones = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.monotonic() - started
+
+    def mark(self, name: str) -> float:
+        elapsed = self.milestones[name] = time.monotonic() - self.started
+        self.logger.info("Startup: %s after %.2fs", name, elapsed)
+        return elapsed
+
+    def report(self):
+        self.logger.info("Startup phases: %s",
+                         ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items()))
+
+    def stats(self) -> dict:
+        return {'phases': dict(self.phases), 'milestones': dict(self.milestones)}
+
+
+class LogiScanRLCApp:
+    def __init__(self, config_path: str = None, config=None, alarm_sink=None):
+        self.startup = StartupTimer()
         setup_logging()
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.config_path = Path('/home/developer/Workspace/logiscan_rlc/config/pipeline_config.yaml')
+        self.config_path = ConfigLoader.resolve_path(config_path)
+        self.config = config
+        self.alarm_sink = alarm_sink
         self.pipeline = None
+        self.pipeline_builder = None
+        self.config_watcher = None
+        self.control_server = None
         self.loop = None
         self.event_loop = None
 
     def run(self):
+        startup = self.startup
         try:
-            config = ConfigLoader.load(self.config_path)
-            Gst.init(None)
-
-            loop_queue = Queue()
-            def run_event_loop():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop_queue.put(loop)
-                loop.run_forever()
-
-            event_loop_thread = threading.Thread(target=run_event_loop, daemon=True)
-            event_loop_thread.start()
-            self.event_loop = loop_queue.get()
-
-            pipeline_builder = PipelineBuilder(config, self.event_loop)
-            self.pipeline = pipeline_builder.build_pipeline(config['pipeline']['sources'])
+            with startup.phase('config'):
+                config = self.config or ConfigLoader.load(self.config_path)
+                setup_logging(config.logging)
+
+            # GStreamer, DeepStream bindings and the pipeline modules are only loaded once the config is valid.
+            with startup.phase('imports'):
+                import gi
+                gi.require_version('Gst', '1.0')
+                from gi.repository import Gst, GLib
+                from .pipeline.pipeline_builder import PipelineBuilder
+                Gst.init(None)
+
+            with startup.phase('event-loop'):
+                loop_queue = Queue()
+                def run_event_loop():
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    loop_queue.put(loop)
+                    loop.run_forever()
+
+                event_loop_thread = threading.Thread(target=run_event_loop, daemon=True)
+                event_loop_thread.start()
+                self.event_loop = loop_queue.get()
+
+            staged = config.startup.staged
+            with startup.phase('build'):
+                self.pipeline_builder = PipelineBuilder(config, self.event_loop, alarm_sink=self.alarm_sink)
+                # Staged startup brings the core pipeline up empty and hot-adds the sources afterwards.
+                self.pipeline = self.pipeline_builder.build_pipeline([] if staged else config.sources)
+                self.pipeline_builder.analytics_worker.start()
+            analytics = self.pipeline.get_by_name('analytics')
+            analytics.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, self._first_frame_probe, 0)
+            # A preloaded config (e.g. one supervisor shard) is not backed by the file as a whole.
+            if self.config is None:
+                self.config_watcher = ConfigWatcher(self.config_path, config, self.pipeline_builder.apply_config)
+                self.config_watcher.start()
+            if config.control.enable:
+                from .pipeline.control_server import SourceControlServer
+                self.control_server = SourceControlServer(self.pipeline_builder.source_manager,
+                                                          host=config.control.host, port=config.control.port)
+                self.control_server.start()
 
             self.loop = GLib.MainLoop()
-            self.start_pipeline()
+            with startup.phase('playing'):
+                self.start_pipeline()
+            startup.report()
+            if staged:
+                threading.Thread(target=self._add_sources, args=(config,), name="source-startup",
+                                 daemon=True).start()
             self.loop.run()
         except Exception as e:
-            self.logger.exception(f"Unexpected error: {e}")
+            self.logger.exception("Unexpected error: %s", e)
             return 1
         return 0
 
+    def _first_frame_probe(self, pad, info, u_data):
+        from gi.repository import Gst
+        self.startup.mark('first analyzed batch')
+        return Gst.PadProbeReturn.REMOVE
+
+    def _add_sources(self, config):
+        ready = self.pipeline_builder.source_manager.add_sources(config.sources,
+                                                                 ready_timeout=config.startup.source_timeout,
+                                                                 max_workers=config.startup.workers)
+        elapsed = self.startup.mark('sources added')
+        streaming = {source_id: seconds for source_id, seconds in ready.items() if seconds is not None}
+        late = sorted(set(ready) - set(streaming))
+        self.logger.info("Startup: %d/%d sources streaming within %.2fs (slowest %.2fs)%s", len(streaming),
+                         len(config.sources), elapsed, max(streaming.values(), default=0.0),
+                         f"; still negotiating: {late}" if late else "")
+
     def start_pipeline(self):
+        from gi.repository import Gst
         if not self.pipeline:
             raise PipelineError("Pipeline not initialized")
 
@@ -64,27 +144,74 @@ class LogiScanRLCApp:
         bus.add_signal_watch()
         bus.connect("message", self._bus_call)
 
+        if self.pipeline_builder and self.pipeline_builder.instrumentation:
+            self.pipeline_builder.instrumentation.start()
+        if self.pipeline_builder and self.pipeline_builder.source_watchdog:
+            self.pipeline_builder.source_watchdog.start()
+        if self.pipeline_builder and self.pipeline_builder.streammux_tuner:
+            self.pipeline_builder.streammux_tuner.start()
+
         self.logger.info("Starting pipeline...")
         self.pipeline.set_state(Gst.State.PLAYING)
 
     def stop(self):
+        from gi.repository import Gst
         self.logger.info("Stopping pipeline...")
+        if self.config_watcher:
+            self.config_watcher.stop()
+            self.config_watcher = None
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
         if self.pipeline:
             self.pipeline.set_state(Gst.State.NULL)
+        if self.pipeline_builder:
+            if self.pipeline_builder.source_watchdog:
+                self.pipeline_builder.source_watchdog.stop()
+                self.logger.info("Source health: %s", self.pipeline_builder.source_watchdog.stats())
+            if self.pipeline_builder.streammux_tuner:
+                self.pipeline_builder.streammux_tuner.stop()
+            if self.pipeline_builder.instrumentation:
+                self.pipeline_builder.instrumentation.stop()
+            self.pipeline_builder.analytics_worker.stop()
+            self._close_alarm_client()
         if self.loop and self.loop.is_running():
             self.loop.quit()
 
-    def _bus_call(self, bus: Gst.Bus, message: Gst.Message):
+    def _close_alarm_client(self):
+        if not self.event_loop or not self.event_loop.is_running() or not self.pipeline_builder.alarm_client:
+            return
+        async def close():
+            await self.pipeline_builder.alarm_dispatcher.aclose()
+            await self.pipeline_builder.alarm_client.aclose()
+
+        future = asyncio.run_coroutine_threadsafe(close(), self.event_loop)
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            self.logger.warning("Failed to close alarm client: %s", e)
+        self.logger.info("Alarm dispatcher stats: %s", self.pipeline_builder.alarm_dispatcher.stats())
+
+    def _bus_call(self, bus, message):
+        from gi.repository import Gst
         t = message.type
         if t == Gst.MessageType.EOS:
             self.logger.info("End-of-stream")
             self.stop()
         elif t == Gst.MessageType.WARNING:
             err, debug = message.parse_warning()
-            self.logger.warning(f"Warning: {err}: {debug}")
+            self.logger.warning("Warning: %s: %s", err, debug)
+        elif t == Gst.MessageType.STATE_CHANGED and message.src == self.pipeline:
+            _, new_state, _ = message.parse_state_changed()
+            if new_state == Gst.State.PLAYING:
+                self.pipeline_builder.on_pipeline_playing()
         elif t == Gst.MessageType.ERROR:
             err, debug = message.parse_error()
-            self.logger.error(f"Error: {err}: {debug}")
+            watchdog = self.pipeline_builder.source_watchdog if self.pipeline_builder else None
+            if watchdog and watchdog.handle_error(message):
+                self.logger.warning("Source error from %s: %s: %s", message.src.get_name(), err, debug)
+                return True
+            self.logger.error("Error: %s: %s", err, debug)
             self.stop()
         return True
 
@@ -95,9 +222,13 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LogiScanRLC DeepStream analytics application")
+    parser.add_argument('--config', help=f"pipeline configuration YAML (default: ${CONFIG_ENV_VAR} or config/pipeline_config.yaml)")
+    args = parser.parse_args()
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    app = LogiScanRLCApp()
+    app = LogiScanRLCApp(args.config)
     exit_code = app.run()
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils.exceptions import PipelineError
+
+
+class SourceControlServer:
+    def __init__(self, source_manager, host: str = "127.0.0.1", port: int = 9465, timeout: float = 10.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.source_manager = source_manager
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._server = None
+
+    def start(self):
+        server = self
+
+        class ControlHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/sources':
+                    self._reply(404, {'error': 'not found'})
+                    return
+                self._reply(200, {'sources': server.source_manager.list_sources(),
+                                  'max-sources': server.source_manager.max_sources})
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/sources':
+                    self._reply(404, {'error': 'not found'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                    uri = body['uri']
+                    source_id = body.get('source-id')
+                except (ValueError, KeyError, TypeError):
+                    self._reply(400, {'error': "expected a JSON body with a 'uri' field"})
+                    return
+                try:
+                    source_id = server.source_manager.call_in_main_loop(
+                        server.source_manager.add_source, uri, source_id, timeout=server.timeout)
+                except PipelineError as e:
+                    self._reply(409, {'error': str(e)})
+                    return
+                self._reply(201, {'source-id': source_id, 'uri': uri})
+
+            def do_DELETE(self):
+                prefix, _, source_id = self.path.rstrip('/').rpartition('/')
+                if prefix != '/sources' or not source_id.isdigit():
+                    self._reply(404, {'error': 'not found'})
+                    return
+                try:
+                    server.source_manager.call_in_main_loop(
+                        server.source_manager.remove_source, int(source_id), timeout=server.timeout)
+                except PipelineError as e:
+                    self._reply(404, {'error': str(e)})
+                    return
+                self._reply(200, {'source-id': int(source_id)})
+
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), ControlHandler)
+        threading.Thread(target=self._server.serve_forever, name="control-server", daemon=True).start()
+        self.logger.info("Serving source control API on http://%s:%d/sources", self.host, self.port)
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
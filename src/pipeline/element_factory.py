@@ -6,9 +6,22 @@ from ..utils.exceptions import PipelineError
 
 
 class ElementFactory:
-    @staticmethod
-    def create_element(factory_name: str, name: str) -> Gst.Element:
-        element = Gst.ElementFactory.make(factory_name, name)
+    def __init__(self, substitutions: dict = None, latency_us: dict = None):
+        self.substitutions = substitutions or {}
+        self.latency_us = latency_us or {}
+        self.substituted = set()
+
+    def create_element(self, factory_name: str, name: str) -> Gst.Element:
+        substitute = self.substitutions.get(factory_name)
+        element = Gst.ElementFactory.make(substitute or factory_name, name)
         if not element:
             raise PipelineError(f"Unable to create element {name}")
+        if substitute:
+            self.substituted.add(name)
+            if substitute == 'identity':
+                element.set_property('silent', True)
+                element.set_property('sleep-time', self.latency_us.get(factory_name, 0))
         return element
+
+    def is_substituted(self, name: str) -> bool:
+        return name in self.substituted
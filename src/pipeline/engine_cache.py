@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import logging
+import configparser
+from contextlib import contextmanager
+from pathlib import Path
+
+from ..utils.exceptions import ConfigurationError
+
+NETWORK_MODES = {0: 'fp32', 1: 'int8', 2: 'fp16'}
+PATH_PROPERTIES = ('onnx-file', 'labelfile-path', 'custom-lib-path', 'int8-calib-file')
+INDEX_FILE = 'index.json'
+INDEX_LOCK_FILE = 'index.lock'
+
+
+class EngineCacheManager:
+    def __init__(self, cache_dir, max_bytes: int = 8 << 30):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.cache_dir / INDEX_FILE
+        self._index = self._load_index()
+        self._pending = {}
+        self._build_locks = {}
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('engines', {})
+        index.setdefault('hashes', {})
+        return index
+
+    def _save_index(self):
+        tmp_path = self._index_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(self._index, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    @contextmanager
+    def _locked_index(self):
+        # Several processes (supervisor shards) share the cache: every read-modify-write of the index
+        # happens under an exclusive lock on a fresh copy.
+        with open(self.cache_dir / INDEX_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._index = self._load_index()
+                yield self._index
+                self._save_index()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire_build_lock(self, key: str):
+        # Held from the cache miss until the built engine is committed, so one process builds each engine
+        # while the others wait and then hit the cache. The OS drops it if the holder dies.
+        lock_file = open(self.cache_dir / f"{key}.build.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.logger.info("Waiting for another process to build TensorRT engine %s", key)
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _release_build_lock(self, key: str):
+        lock_file = self._build_locks.pop(key, None)
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def content_hash(self, path) -> str:
+        stat = os.stat(path)
+        fingerprint = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        cached = self._index['hashes'].get(fingerprint)
+        if cached:
+            return cached
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        self._index['hashes'] = {k: v for k, v in self._index['hashes'].items()
+                                 if not k.startswith(f"{os.path.abspath(path)}:")}
+        self._index['hashes'][fingerprint] = digest.hexdigest()
+        return digest.hexdigest()
+
+    def engine_key(self, onnx_path, batch_size: int, precision: str, gpu_id: int) -> str:
+        return f"{self.content_hash(onnx_path)[:16]}_b{batch_size}_gpu{gpu_id}_{precision}"
+
+    @staticmethod
+    def read_pgie_config(pgie_config_path) -> configparser.ConfigParser:
+        parser = configparser.ConfigParser(strict=False)
+        parser.optionxform = str
+        if not parser.read(pgie_config_path) or 'property' not in parser:
+            raise ConfigurationError(f"Unable to read [property] section from {pgie_config_path}")
+        return parser
+
+    def resolve(self, pgie_config_path, batch_size: int) -> str:
+        parser = self.read_pgie_config(pgie_config_path)
+        properties = parser['property']
+        # The effective config lives in the cache directory, so relative paths are anchored to the original.
+        config_dir = os.path.dirname(os.path.abspath(pgie_config_path))
+        for name in PATH_PROPERTIES:
+            if name in properties and not os.path.isabs(properties[name]):
+                properties[name] = os.path.join(config_dir, properties[name])
+        onnx_path = properties.get('onnx-file')
+        if not onnx_path:
+            raise ConfigurationError(f"{pgie_config_path} has no onnx-file to build an engine from")
+        precision = NETWORK_MODES.get(properties.getint('network-mode', 0), 'fp32')
+        gpu_id = properties.getint('gpu-id', 0)
+
+        with self._locked_index():
+            key = self.engine_key(onnx_path, batch_size, precision, gpu_id)
+        engine_path = self.cache_dir / f"{key}.engine"
+        if not engine_path.exists() and key not in self._build_locks:
+            self._build_locks[key] = self._acquire_build_lock(key)
+        with self._locked_index() as index:
+            entry = index['engines'].get(key)
+            if entry and engine_path.exists():
+                entry['last_used'] = time.time()
+                self._release_build_lock(key)
+                self.logger.info("TensorRT engine cache hit: %s", engine_path)
+            else:
+                index['engines'][key] = {
+                    'onnx': os.path.abspath(onnx_path),
+                    'batch_size': batch_size,
+                    'precision': precision,
+                    'gpu_id': gpu_id,
+                    'size': 0,
+                    'last_used': time.time(),
+                }
+                self._pending[key] = self.default_engine_path(onnx_path, batch_size, gpu_id, precision)
+                self.logger.info("TensorRT engine cache miss for %s, nvinfer will build it", key)
+
+        properties['model-engine-file'] = str(engine_path)
+        properties['batch-size'] = str(batch_size)
+        effective_path = self.cache_dir / f"pgie_{key}.txt"
+        tmp_path = effective_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as file:
+            parser.write(file, space_around_delimiters=False)
+        os.replace(tmp_path, effective_path)
+        return str(effective_path)
+
+    @staticmethod
+    def default_engine_path(onnx_path, batch_size: int, gpu_id: int, precision: str) -> Path:
+        return Path(f"{onnx_path}_b{batch_size}_gpu{gpu_id}_{precision}.engine")
+
+    def commit_pending(self):
+        with self._locked_index() as index:
+            for key, built_path in list(self._pending.items()):
+                engine_path = self.cache_dir / f"{key}.engine"
+                if not engine_path.exists() and built_path.exists():
+                    # Move rather than copy so the engine is not kept twice outside the LRU budget; the
+                    # tmp hop keeps a cross-filesystem move from exposing a partial engine to other shards.
+                    tmp_path = engine_path.with_suffix(f'.{os.getpid()}.tmp')
+                    shutil.move(str(built_path), str(tmp_path))
+                    os.replace(tmp_path, engine_path)
+                if engine_path.exists():
+                    entry = index['engines'].setdefault(key, {'size': 0})
+                    entry['size'] = engine_path.stat().st_size
+                    entry['last_used'] = time.time()
+                    self.logger.info("Cached TensorRT engine %s", engine_path)
+                    del self._pending[key]
+                    self._release_build_lock(key)
+            self.evict()
+
+    def evict(self, keep=()):
+        engines = self._index['engines']
+        total = sum(entry['size'] for entry in engines.values())
+        for key in sorted(engines, key=lambda k: engines[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key in keep or key in self._pending:
+                continue
+            total -= engines[key]['size']
+            for path in (self.cache_dir / f"{key}.engine", self.cache_dir / f"pgie_{key}.txt"):
+                if path.exists():
+                    path.unlink()
+            del engines[key]
+            self.logger.info("Evicted TensorRT engine %s", key)
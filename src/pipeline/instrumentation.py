@@ -0,0 +1,178 @@
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+MAX_PENDING_BUFFERS = 64
+
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class StageTimer:
+    __slots__ = ('name', 'histogram', 'pending')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.histogram = LatencyHistogram()
+        self.pending = {}
+
+    def sink_probe(self, pad, info, u_data):
+        buffer = info.get_buffer()
+        if buffer:
+            if len(self.pending) >= MAX_PENDING_BUFFERS:
+                self.pending.clear()
+            self.pending[buffer.pts] = time.perf_counter()
+        return Gst.PadProbeReturn.OK
+
+    def src_probe(self, pad, info, u_data):
+        buffer = info.get_buffer()
+        if buffer:
+            started = self.pending.pop(buffer.pts, None)
+            if started is not None:
+                self.histogram.observe(time.perf_counter() - started)
+        return Gst.PadProbeReturn.OK
+
+
+class PipelineInstrumentation:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, poll_interval_ms: int = 1000):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.host = host
+        self.port = port
+        self.poll_interval_ms = poll_interval_ms
+        self.stages = []
+        self.queues = []
+        self.source_frames = {}
+        self.source_fps = {}
+        self.queue_levels = {}
+        self.collectors = {}
+        self._last_poll = None
+        self._last_frames = {}
+        # Sources come and go on other threads while the HTTP thread renders; dict resizes happen under this lock.
+        self._lock = threading.Lock()
+        self._timeout_id = None
+        self._server = None
+
+    def attach_stage(self, element: Gst.Element):
+        timer = StageTimer(element.get_name())
+        element.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, timer.sink_probe, 0)
+        element.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, timer.src_probe, 0)
+        self.stages.append(timer)
+
+    def attach_queue(self, queue: Gst.Element):
+        self.queues.append(queue)
+
+    def attach_source(self, source_id: int, pad: Gst.Pad):
+        with self._lock:
+            self.source_frames[source_id] = 0
+
+        def source_probe(pad, info, u_data):
+            self.source_frames[source_id] += 1
+            return Gst.PadProbeReturn.OK
+
+        pad.add_probe(Gst.PadProbeType.BUFFER, source_probe, 0)
+
+    def detach_source(self, source_id: int):
+        with self._lock:
+            self.source_frames.pop(source_id, None)
+            self.source_fps.pop(source_id, None)
+            self._last_frames.pop(source_id, None)
+
+    def add_collector(self, prefix: str, collect):
+        self.collectors[prefix] = collect
+
+    def start(self):
+        self._timeout_id = GLib.timeout_add(self.poll_interval_ms, self._poll)
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = instrumentation.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        self.logger.info("Serving pipeline metrics on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def _poll(self):
+        now = time.monotonic()
+        queue_levels = {queue.get_name(): (queue.get_property('current-level-buffers'),
+                                           queue.get_property('current-level-time') / Gst.SECOND)
+                        for queue in self.queues}
+        with self._lock:
+            frames = dict(self.source_frames)
+            if self._last_poll is not None:
+                elapsed = now - self._last_poll
+                for source_id, count in frames.items():
+                    self.source_fps[source_id] = (count - self._last_frames.get(source_id, 0)) / elapsed
+            self._last_poll = now
+            self._last_frames = frames
+            self.queue_levels = queue_levels
+        return True
+
+    def render(self) -> str:
+        with self._lock:
+            source_frames = sorted(self.source_frames.items())
+            source_fps = sorted(self.source_fps.items())
+            queue_levels = list(self.queue_levels.items())
+        lines = [
+            '# TYPE logiscan_source_frames_total counter',
+            *(f'logiscan_source_frames_total{{source="{s}"}} {n}' for s, n in source_frames),
+            '# TYPE logiscan_source_fps gauge',
+            *(f'logiscan_source_fps{{source="{s}"}} {fps:.3f}' for s, fps in source_fps),
+            '# TYPE logiscan_queue_level_buffers gauge',
+            *(f'logiscan_queue_level_buffers{{queue="{q}"}} {b}' for q, (b, _) in queue_levels),
+            '# TYPE logiscan_queue_level_seconds gauge',
+            *(f'logiscan_queue_level_seconds{{queue="{q}"}} {t:.6f}' for q, (_, t) in queue_levels),
+            '# TYPE logiscan_stage_latency_seconds histogram',
+        ]
+        for stage in self.stages:
+            histogram = stage.histogram
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'logiscan_stage_latency_seconds_bucket{{stage="{stage.name}",le="{bound}"}} {cumulative}')
+            lines.append(f'logiscan_stage_latency_seconds_bucket{{stage="{stage.name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'logiscan_stage_latency_seconds_sum{{stage="{stage.name}"}} {histogram.total:.6f}')
+            lines.append(f'logiscan_stage_latency_seconds_count{{stage="{stage.name}"}} {histogram.count}')
+        for prefix, collect in self.collectors.items():
+            for key, value in collect().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'logiscan_{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
@@ -1,56 +1,280 @@
 import gi
 import logging
+import functools
 from typing import List
 
 gi.require_version('Gst', '1.0')
-from gi.repository import Gst
+from gi.repository import Gst, GLib
 
-from ..alerts.alarm_client import AlarmClient
-from ..pipeline.source_bin import SourceBin
+from ..pipeline.source_bin import SourceBin, TestSourceBin
+from ..pipeline.source_manager import SourceManager
+from ..pipeline.source_watchdog import SourceWatchdog
+from ..pipeline.streammux_tuner import StreammuxTuner
 from ..pipeline.element_factory import ElementFactory
-from ..pipeline.pipeline_config import PipelineConfig
+from ..pipeline.pipeline_config import PipelineConfig, SUBSTITUTIONS
+from ..pipeline.instrumentation import PipelineInstrumentation
+from ..pipeline.engine_cache import EngineCacheManager
 from ..analytics.analytics_probe import AnalyticsProbe
+from ..analytics.analytics_worker import AnalyticsWorker
+from ..analytics.handoff_queue import BatchHandoffQueue
+from ..analytics.inference_scheduler import InferenceIntervalScheduler
+from ..analytics.occupancy import RoiOccupancyEngine
+from ..analytics.recording import MetadataRecorder
+from ..analytics.roi_engine import RoiEngine, RoiZoneMonitor
+from ..analytics.track_state import TrackStateTable
+from ..storage.event_store import EventStore
+from ..utils.config_model import AppConfig
 from ..utils.exceptions import PipelineError
+from ..utils.logger import setup_logging
 
 class PipelineBuilder:
-    def __init__(self, config: dict, event_loop):
-        self.config = PipelineConfig(config)
-        self.element_factory = ElementFactory()
+    def __init__(self, config: AppConfig, event_loop, alarm_sink=None):
+        self.app_config = config
+        self.engine_cache = None
+        if config.pgie.engine_cache_dir:
+            self.engine_cache = EngineCacheManager(config.pgie.engine_cache_dir,
+                                                   max_bytes=config.pgie.engine_cache_max_mb << 20)
+        self.config = PipelineConfig(config, self.engine_cache)
+        substitution = config.substitution
+        self.element_factory = ElementFactory(SUBSTITUTIONS.get(substitution.profile),
+                                              latency_us=substitution.latency_us)
+        self.source_factory = SourceBin
+        if substitution.profile:
+            self.source_factory = functools.partial(TestSourceBin, width=substitution.width,
+                                                    height=substitution.height, framerate=substitution.framerate)
+        self.pipeline = None
+        self.source_manager = None
+        self.source_watchdog = None
+        self.streammux_tuner = None
 
-        alarm_uri = config['pipeline']['alarm']['uri']
-        self.alarm_client = AlarmClient(alarm_uri)
-        self.analytics_probe = AnalyticsProbe(self.alarm_client, event_loop)
+        self.alarm_client = None
+        self.alarm_dispatcher = None
+        if alarm_sink is None:
+            # Imported here so processes that forward alarms elsewhere never load the HTTP stack.
+            from ..alerts.alarm_client import AlarmClient
+            from ..alerts.alarm_dispatcher import AlarmDispatcher
+            alarm = config.alarm
+            self.alarm_client = AlarmClient(
+                alarm.uri,
+                username=alarm.username,
+                password=alarm.password,
+                token_ttl=alarm.token_ttl,
+                status_ttl=alarm.status_ttl
+            )
+            self.alarm_dispatcher = AlarmDispatcher(
+                self.alarm_client,
+                event_loop,
+                coalesce_window=alarm.coalesce_window,
+                max_retries=alarm.max_retries,
+                retry_base_delay=alarm.retry_base_delay,
+                retry_max_delay=alarm.retry_max_delay
+            )
+        analytics = config.analytics
+        engine = RoiOccupancyEngine(
+            threshold_count=analytics.threshold_count,
+            window_seconds=analytics.window_seconds,
+            statistic=analytics.statistic,
+            percentile=analytics.percentile,
+            min_samples=analytics.min_samples,
+            history_size=analytics.history_size
+        )
+        self.handoff_queue = BatchHandoffQueue(
+            capacity=analytics.queue_size,
+            overflow_policy=analytics.overflow_policy
+        )
+        consumers = []
+        if analytics.record_path:
+            consumers.append(MetadataRecorder(analytics.record_path, chunk_frames=analytics.record_chunk_frames))
+        self.roi_monitor = None
+        if analytics.roi_monitor:
+            self.roi_monitor = RoiZoneMonitor(self._create_roi_engine(config), analytics.roi_report_interval)
+            consumers.append(self.roi_monitor)
+        self.inference_scheduler = None
+        schedule = config.pgie.schedule
+        if schedule.enable:
+            self.inference_scheduler = InferenceIntervalScheduler(
+                apply_interval=self._set_inference_interval,
+                min_interval=schedule.min_interval,
+                max_interval=schedule.max_interval,
+                quiet_seconds=schedule.quiet_seconds,
+                count_delta=schedule.count_delta,
+                new_tracks=schedule.new_tracks,
+                track_ttl=analytics.track_ttl
+            )
+            consumers.append(self.inference_scheduler)
+        self.event_store = None
+        storage = config.storage
+        if storage.enable:
+            self.event_store = EventStore(
+                storage.path,
+                flush_interval=storage.flush_interval,
+                buffer_rows=storage.buffer_rows,
+                partition_seconds=storage.partition_seconds,
+                retention_hours=storage.retention_hours
+            )
+            consumers.append(self.event_store)
+        track_state = None
+        if analytics.track_state:
+            track_state = TrackStateTable(
+                ttl_seconds=analytics.track_ttl,
+                dwell_seconds=analytics.dwell_seconds,
+                unique_window=analytics.unique_window,
+                unique_min=analytics.unique_min,
+                unique_max=analytics.unique_max,
+                max_tracks=analytics.max_tracks
+            )
+        self.analytics_worker = AnalyticsWorker(self.handoff_queue, engine, alarm_sink or self.alarm_dispatcher,
+                                                check_interval_seconds=analytics.check_interval,
+                                                consumers=consumers,
+                                                track_state=track_state,
+                                                event_store=self.event_store)
+        if substitution.profile:
+            # Stand-in elements attach no DeepStream metadata, so the probe runs on generated batches.
+            self.analytics_probe = AnalyticsProbe(self.handoff_queue, 'fake', num_sources=len(config.sources),
+                                                  width=config.streammux.width, height=config.streammux.height)
+        else:
+            self.analytics_probe = AnalyticsProbe(self.handoff_queue, analytics.metadata_backend)
+
+        self.instrumentation = None
+        instrumentation = config.instrumentation
+        if instrumentation.enable:
+            self.instrumentation = PipelineInstrumentation(
+                host=instrumentation.host,
+                port=instrumentation.port,
+                poll_interval_ms=instrumentation.poll_interval_ms
+            )
+            self.instrumentation.add_collector('handoff_queue', self.handoff_queue.stats)
+            if self.alarm_dispatcher:
+                self.instrumentation.add_collector('alarm', self.alarm_dispatcher.stats)
+            if track_state:
+                self.instrumentation.add_collector('tracks', track_state.stats)
+            if self.inference_scheduler:
+                self.instrumentation.add_collector('inference', self.inference_scheduler.stats)
+            if self.event_store:
+                self.instrumentation.add_collector('storage', self.event_store.stats)
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def _create_roi_engine(self, config: AppConfig) -> RoiEngine:
+        return RoiEngine.from_config(config.nvdsanalytics.config_file,
+                                     frame_size=(config.streammux.width, config.streammux.height),
+                                     anchor=config.analytics.roi_anchor)
+
+    def apply_config(self, config: AppConfig, reload_analytics_file: bool = False):
+        analytics = config.analytics
+        engine = self.analytics_worker.engine
+        engine.threshold_count = analytics.threshold_count
+        engine.window_seconds = analytics.window_seconds
+        engine.statistic = analytics.statistic
+        engine.percentile = analytics.percentile
+        engine.min_samples = analytics.min_samples
+        self.analytics_worker.check_interval_seconds = analytics.check_interval
+        track_state = self.analytics_worker.track_state
+        if track_state:
+            track_state.ttl_seconds = analytics.track_ttl
+            track_state.dwell_seconds = analytics.dwell_seconds
+            track_state.unique_window = analytics.unique_window
+            track_state.unique_min = analytics.unique_min
+            track_state.unique_max = analytics.unique_max
+
+        if self.inference_scheduler:
+            schedule = config.pgie.schedule
+            self.inference_scheduler.update_settings(schedule.min_interval, schedule.max_interval,
+                                                     schedule.quiet_seconds, schedule.count_delta,
+                                                     schedule.new_tracks)
+            self.inference_scheduler.track_ttl = analytics.track_ttl
+
+        alarm = config.alarm
+        if alarm != self.app_config.alarm and self.alarm_client:
+            self.alarm_client.update_settings(alarm.uri, alarm.username, alarm.password,
+                                              alarm.token_ttl, alarm.status_ttl)
+            self.alarm_dispatcher.coalesce_window = alarm.coalesce_window
+            self.alarm_dispatcher.max_retries = alarm.max_retries
+            self.alarm_dispatcher.retry_base_delay = alarm.retry_base_delay
+            self.alarm_dispatcher.retry_max_delay = alarm.retry_max_delay
+
+        if config.logging != self.app_config.logging:
+            setup_logging(config.logging)
+
+        if reload_analytics_file or config.nvdsanalytics != self.app_config.nvdsanalytics:
+            if self.pipeline:
+                GLib.idle_add(self._reload_nvdsanalytics, config.nvdsanalytics.config_file)
+            if self.roi_monitor:
+                self.roi_monitor.set_engine(self._create_roi_engine(config))
+        self.app_config = config
+        self.config = PipelineConfig(config, self.engine_cache)
+
+    def on_pipeline_playing(self):
+        if self.engine_cache:
+            self.engine_cache.commit_pending()
+        if self.source_watchdog:
+            self.source_watchdog.arm()
+
+    def _set_inference_interval(self, interval: int):
+        if self.pipeline:
+            GLib.idle_add(self._apply_inference_interval, interval)
+
+    def _apply_inference_interval(self, interval: int):
+        pgie = self.pipeline.get_by_name('primary-inference')
+        if pgie and not self.element_factory.is_substituted('primary-inference'):
+            pgie.set_property('interval', interval)
+        return False
+
+    def _reload_nvdsanalytics(self, config_file: str):
+        analytics = self.pipeline.get_by_name('analytics')
+        if analytics and not self.element_factory.is_substituted('analytics'):
+            analytics.set_property("config-file", config_file)
+            self.logger.info("Reloaded nvdsanalytics configuration from %s", config_file)
+        return False
+
     def build_pipeline(self, uris: List[str]) -> Gst.Pipeline:
         pipeline = Gst.Pipeline.new("logiscanre-analytics-pipeline")
         if not pipeline:
             raise PipelineError("Unable to create Pipeline")
+        self.pipeline = pipeline
 
         streammux = self.element_factory.create_element('nvstreammux', 'Stream-muxer')
         pipeline.add(streammux)
-        for i, uri in enumerate(uris):
-            source_bin = SourceBin(i, uri).create()
-            if not source_bin:
-                raise PipelineError(f"Unable to create source bin for {uri}")
-            pipeline.add(source_bin)
-            sinkpad = streammux.request_pad_simple(f"sink_{i}")
-            if not sinkpad:
-                raise PipelineError(f"Unable to get sink pad from streammux for source {i}")
-            srcpad = source_bin.get_static_pad("src")
-            if not srcpad:
-                raise PipelineError(f"Unable to get src pad from source bin for source {i}")
-            srcpad.link(sinkpad)
-
-        queues = [self.element_factory.create_element("queue", f"queue{i + 1}") for i in range(7)]
-        self._add_elements_to_pipeline(pipeline, queues)
+        tuner = self.app_config.streammux.tuner
+        if tuner.enable and self.element_factory.is_substituted('Stream-muxer'):
+            self.logger.warning("Streammux tuner disabled: %s has no batched-push-timeout", streammux.get_name())
+        elif tuner.enable:
+            self.streammux_tuner = StreammuxTuner(streammux, self.app_config.max_sources,
+                                                  max_latency=tuner.max_latency_ms / 1000,
+                                                  window_seconds=tuner.window_seconds,
+                                                  tune_interval=tuner.tune_interval,
+                                                  apply=tuner.apply,
+                                                  trace_path=tuner.trace_path)
+            self.streammux_tuner.attach_output(streammux.get_static_pad("src"))
+            if self.instrumentation:
+                self.instrumentation.add_collector('streammux', self.streammux_tuner.stats)
+        self.source_manager = SourceManager(pipeline, streammux, self.app_config.max_sources,
+                                            on_source_added=self._on_source_added,
+                                            on_source_removed=self._on_source_removed,
+                                            source_factory=self.source_factory)
+        watchdog = self.app_config.watchdog
+        if watchdog.enable:
+            self.source_watchdog = SourceWatchdog(self.source_manager,
+                                                  stall_timeout=watchdog.stall_timeout,
+                                                  check_interval_ms=watchdog.check_interval_ms,
+                                                  backoff_base=watchdog.backoff_base,
+                                                  backoff_max=watchdog.backoff_max,
+                                                  stable_seconds=watchdog.stable_seconds,
+                                                  connect_timeout=watchdog.connect_timeout)
+            if self.instrumentation:
+                self.instrumentation.add_collector('source', self.source_watchdog.metrics)
+        for uri in uris:
+            self.source_manager.add_source(uri)
 
         elements = self._create_elements()
-        self._configure_elements(streammux, elements, len(uris))
+        queues = self._create_queues(elements)
+        self._add_elements_to_pipeline(pipeline, queues)
+        self._configure_elements(streammux, elements, self.app_config.max_sources)
         self._add_elements_to_pipeline(pipeline, elements)
         self._link_elements(streammux, queues, elements)
+        if self.instrumentation:
+            self._instrument_elements(queues, elements)
 
-        nvanalytics_src_pad = elements[2].get_static_pad("src")
+        nvanalytics_src_pad = pipeline.get_by_name('analytics').get_static_pad("src")
         if not nvanalytics_src_pad:
             raise PipelineError("Unable to get src pad from nvanalytics")
         else:
@@ -59,47 +283,71 @@ class PipelineBuilder:
 
         return pipeline
 
+    def _on_source_added(self, source):
+        if self.instrumentation:
+            self.instrumentation.attach_source(source.source_id, source.sinkpad)
+        if self.source_watchdog:
+            self.source_watchdog.watch(source)
+        if self.streammux_tuner:
+            self.streammux_tuner.attach_source(source.source_id, source.sinkpad)
+
+    def _on_source_removed(self, source_id: int):
+        self.analytics_worker.reset_source(source_id)
+        if self.instrumentation:
+            self.instrumentation.detach_source(source_id)
+        if self.source_watchdog:
+            self.source_watchdog.forget(source_id)
+
     def _create_elements(self) -> List[Gst.Element]:
-        return [
-            self.element_factory.create_element('nvinfer', 'primary-inference'),
-            self.element_factory.create_element('nvtracker', 'tracker'),
-            self.element_factory.create_element('nvdsanalytics', 'analytics'),
-            self.element_factory.create_element('nvmultistreamtiler', 'nvtiler'),
-            self.element_factory.create_element('nvvideoconvert', 'convertor'),
-            self.element_factory.create_element('nvdsosd', 'onscreendisplay'),
-            self.element_factory.create_element('nveglglessink', 'nvvideo-renderer')
-        ]
+        return [self.element_factory.create_element(factory_name, name)
+                for factory_name, name in self.config.profile_elements()]
+
+    def _create_queues(self, elements: List[Gst.Element]) -> List[Gst.Element]:
+        queues = []
+        for i, element in enumerate(elements):
+            queue = self.element_factory.create_element("queue", f"queue{i + 1}")
+            self.config.configure_queue(queue, element.get_name())
+            queues.append(queue)
+        return queues
+
+    def _instrument_elements(self, queues: List[Gst.Element], elements: List[Gst.Element]):
+        for queue in queues:
+            self.instrumentation.attach_queue(queue)
+        for element in elements:
+            if element.get_static_pad("src"):
+                self.instrumentation.attach_stage(element)
 
     def _add_elements_to_pipeline(self, pipeline: Gst.Pipeline, elements: List[Gst.Element]):
         for element in elements:
             pipeline.add(element)
 
     def _link_elements(self, streammux: Gst.Element, queues: List[Gst.Element], elements: List[Gst.Element]):
-        try:
-            streammux.link(queues[0])
-            queues[0].link(elements[0])
-            elements[0].link(queues[1])
-            queues[1].link(elements[1])
-            elements[1].link(queues[2])
-            queues[2].link(elements[2])
-            elements[2].link(queues[3])
-            queues[3].link(elements[3])
-            elements[3].link(queues[4])
-            queues[4].link(elements[4])
-            elements[4].link(queues[5])
-            queues[5].link(elements[5])
-            elements[5].link(queues[6])
-            queues[6].link(elements[6])
-        except Exception as e:
-            raise PipelineError(f"Failed to link elements: {e}")
+        upstream = streammux
+        for queue, element in zip(queues, elements):
+            for src, sink in ((upstream, queue), (queue, element)):
+                if not src.link(sink):
+                    raise PipelineError(f"Failed to link elements: {src.get_name()} -> {sink.get_name()}")
+            upstream = element
 
     def _configure_elements(self, streammux: Gst.Element, elements: List[Gst.Element], num_sources: int):
-        pgie, nvtracker, nvdsanalytics, nvtiler, nvvidconv, nvosd, sink = elements
-
-        self.config.configure_streammux(streammux, num_sources)
-        self.config.configure_pgie(pgie, num_sources)
-        self.config.configure_tracker(nvtracker)
-        self.config.configure_analytics(nvdsanalytics)
-        self.config.configure_tiler(nvtiler, num_sources)
-        self.config.configure_sink(sink)
-        self.config.configure_osd(nvosd)
\ No newline at end of file
+        if not self.element_factory.is_substituted(streammux.get_name()):
+            self.config.configure_streammux(streammux, num_sources)
+        for element in elements:
+            name = element.get_name()
+            if self.element_factory.is_substituted(name):
+                if element.get_factory().get_name() == 'fakesink':
+                    self.config.configure_fakesink(element)
+            elif name == 'primary-inference':
+                self.config.configure_pgie(element, num_sources)
+            elif name == 'tracker':
+                self.config.configure_tracker(element)
+            elif name == 'analytics':
+                self.config.configure_analytics(element)
+            elif name == 'nvtiler':
+                self.config.configure_tiler(element, num_sources)
+            elif name == 'onscreendisplay':
+                self.config.configure_osd(element)
+            elif name == 'nvvideo-renderer':
+                self.config.configure_sink(element)
+            elif name == 'fakesink':
+                self.config.configure_fakesink(element)
@@ -1,51 +1,96 @@
-import configparser
 import logging
 import math
 
+from ..utils.exceptions import ConfigurationError
+
+ANALYTICS_ELEMENTS = [
+    ('nvinfer', 'primary-inference'),
+    ('nvtracker', 'tracker'),
+    ('nvdsanalytics', 'analytics'),
+]
+
+PROFILES = {
+    'display': ANALYTICS_ELEMENTS + [
+        ('nvmultistreamtiler', 'nvtiler'),
+        ('nvvideoconvert', 'convertor'),
+        ('nvdsosd', 'onscreendisplay'),
+        ('nveglglessink', 'nvvideo-renderer'),
+    ],
+    'headless': ANALYTICS_ELEMENTS + [
+        ('fakesink', 'fakesink'),
+    ],
+}
+
+# CPU stand-ins for the DeepStream elements, so the topology can run without a GPU.
+SUBSTITUTIONS = {
+    'cpu': {
+        'nvstreammux': 'compositor',
+        'nvinfer': 'identity',
+        'nvtracker': 'identity',
+        'nvdsanalytics': 'identity',
+        'nvmultistreamtiler': 'identity',
+        'nvvideoconvert': 'identity',
+        'nvdsosd': 'identity',
+        'nveglglessink': 'fakesink',
+    },
+}
+
 
 class PipelineConfig:
-    def __init__(self, config: dict):
+    def __init__(self, config, engine_cache=None):
         self.config = config
+        self.engine_cache = engine_cache
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    @property
+    def profile(self) -> str:
+        profile = self.config.profile
+        if profile not in PROFILES:
+            raise ConfigurationError(f"Unknown pipeline profile '{profile}', expected one of {list(PROFILES)}")
+        return profile
+
+    def profile_elements(self):
+        return PROFILES[self.profile]
+
+    def configure_queue(self, queue, downstream_name: str):
+        queues = self.config.queues
+        settings = dict(queues.get('default', {}))
+        settings.update(queues.get(downstream_name, {}))
+        for key, value in settings.items():
+            queue.set_property(key, value)
+
     def configure_streammux(self, streammux, num_sources: int):
-        streammux.set_property('width', self.config['pipeline']['streammux']['width'])
-        streammux.set_property('height', self.config['pipeline']['streammux']['height'])
+        streammux.set_property('width', self.config.streammux.width)
+        streammux.set_property('height', self.config.streammux.height)
         streammux.set_property('batch-size', num_sources)
-        streammux.set_property('batched-push-timeout', self.config['pipeline']['streammux']['batch-timeout'])
+        streammux.set_property('batched-push-timeout', self.config.streammux.batch_timeout)
         streammux.set_property('live-source', 1)
         streammux.set_property('enable-padding', 0)
         streammux.set_property('nvbuf-memory-type', 0)
 
     def configure_pgie(self, pgie, num_sources: int):
-        pgie.set_property('config-file-path', self.config['pipeline']['pgie']['config-file'])
+        config_file = self.config.pgie.config_file
+        if self.engine_cache:
+            config_file = self.engine_cache.resolve(config_file, num_sources)
+            pgie.set_property('batch-size', num_sources)
+        pgie.set_property('config-file-path', config_file)
+        if self.config.pgie.schedule.enable:
+            pgie.set_property('interval', self.config.pgie.schedule.min_interval)
 
     def configure_tracker(self, tracker):
-        config = configparser.ConfigParser()
-        config.read(self.config['pipeline']['tracker']['config-file'])
-
-        for key in config['tracker']:
-            if key == 'tracker-width':
-                tracker.set_property('tracker-width', config.getint('tracker', key))
-            elif key == 'tracker-height':
-                tracker.set_property('tracker-height', config.getint('tracker', key))
-            elif key == 'gpu-id':
-                tracker.set_property('gpu_id', config.getint('tracker', key))
-            elif key == 'll-lib-file':
-                tracker.set_property('ll-lib-file', config.get('tracker', key))
-            elif key == 'll-config-file':
-                tracker.set_property('ll-config-file', config.get('tracker', key))
+        for name, value in self.config.tracker.properties.items():
+            tracker.set_property(name, value)
 
     def configure_analytics(self, analytics):
-        analytics.set_property("config-file", self.config['pipeline']['nvdsanalytics']['config-file'])
+        analytics.set_property("config-file", self.config.nvdsanalytics.config_file)
 
     def configure_tiler(self, tiler, num_sources: int):
         tiler_rows = int(math.sqrt(num_sources))
         tiler_columns = int(math.ceil((1.0 * num_sources) / tiler_rows))
         tiler.set_property("rows", tiler_rows)
         tiler.set_property("columns", tiler_columns)
-        tiler.set_property('width', self.config['pipeline']['tiler']['width'])
-        tiler.set_property('height', self.config['pipeline']['tiler']['height'])
+        tiler.set_property('width', self.config.tiler.width)
+        tiler.set_property('height', self.config.tiler.height)
         tiler.set_property('gpu-id', 0)
         tiler.set_property('nvbuf-memory-type', 0)
 
@@ -53,6 +98,11 @@ class PipelineConfig:
         sink.set_property('sync', 0)
         sink.set_property('gpu-id', 0)
 
+    def configure_fakesink(self, sink):
+        sink.set_property('sync', 0)
+        sink.set_property('async', 0)
+        sink.set_property('enable-last-sample', 0)
+
     def configure_osd(self, nvosd):
         nvosd.set_property('process-mode', 0)
         nvosd.set_property('display-text', 1)
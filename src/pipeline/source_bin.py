@@ -46,3 +46,51 @@ class SourceBin:
     def _decodebin_child_added(self, child_proxy, Object, name, user_data):
         if name.find("decodebin") != -1:
             Object.connect("child-added", self._decodebin_child_added, user_data)
+
+
+class TestSourceBin:
+    # CPU-only source: decodes file:// URIs in software and renders a live test pattern for anything else.
+    def __init__(self, index: int, uri: str, width: int = 320, height: int = 240, framerate: int = 30):
+        self.index = index
+        self.uri = uri
+        self.caps = f"video/x-raw,format=I420,width={width},height={height},framerate={framerate}/1"
+
+    def create(self) -> Gst.Bin:
+        bin_name = f"source-bin-{self.index:02d}"
+        nbin = Gst.Bin.new(bin_name)
+        if not nbin:
+            raise PipelineError(f"Unable to create bin {bin_name}")
+
+        capsfilter = Gst.ElementFactory.make("capsfilter", "source-caps")
+        capsfilter.set_property("caps", Gst.Caps.from_string(self.caps))
+        if self.uri.startswith("file://"):
+            chain = [Gst.ElementFactory.make(factory, factory) for factory in ("videoconvert", "videoscale", "videorate")]
+            head = Gst.ElementFactory.make("uridecodebin", "uri-decode-bin")
+            if not head or not all(chain):
+                raise PipelineError(f"Unable to create software decode chain for {self.uri}")
+            head.set_property("uri", self.uri)
+            head.connect("pad-added", self._cb_newpad, chain[0])
+        else:
+            head = Gst.ElementFactory.make("videotestsrc", "test-source")
+            if not head:
+                raise PipelineError("Unable to create videotestsrc")
+            head.set_property("is-live", True)
+            head.set_property("pattern", "ball")
+            chain = []
+        # uridecodebin pads appear at runtime, so only the static part of the chain is linked here.
+        static = chain + [capsfilter] if chain else [head, capsfilter]
+        for element in ([head] if chain else []) + static:
+            nbin.add(element)
+        for upstream, downstream in zip(static, static[1:]):
+            if not upstream.link(downstream):
+                raise PipelineError(f"Failed to link {upstream.get_name()} -> {downstream.get_name()} in {bin_name}")
+
+        bin_pad = nbin.add_pad(Gst.GhostPad.new("src", capsfilter.get_static_pad("src")))
+        if not bin_pad:
+            raise PipelineError("Failed to add ghost pad in source bin")
+        return nbin
+
+    def _cb_newpad(self, decodebin, decoder_src_pad, convert):
+        caps = decoder_src_pad.get_current_caps()
+        if caps.get_structure(0).get_name().startswith("video"):
+            decoder_src_pad.link(convert.get_static_pad("sink"))
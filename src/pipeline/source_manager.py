@@ -0,0 +1,149 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+from ..pipeline.source_bin import SourceBin
+from ..utils.exceptions import PipelineError
+
+
+class ManagedSource:
+    __slots__ = ('source_id', 'uri', 'bin', 'sinkpad', 'added_at', 'ready', 'ready_at')
+
+    def __init__(self, source_id: int, uri: str, source_bin: Gst.Bin, sinkpad: Gst.Pad):
+        self.source_id = source_id
+        self.uri = uri
+        self.bin = source_bin
+        self.sinkpad = sinkpad
+        self.added_at = time.time()
+        self.ready = threading.Event()
+        self.ready_at = None
+
+    def first_buffer_probe(self, pad, info, u_data):
+        self.ready_at = time.time()
+        self.ready.set()
+        return Gst.PadProbeReturn.REMOVE
+
+    def to_dict(self) -> dict:
+        return {'source-id': self.source_id, 'uri': self.uri, 'added-at': self.added_at, 'ready-at': self.ready_at}
+
+
+class SourceManager:
+    def __init__(self, pipeline: Gst.Pipeline, streammux: Gst.Element, max_sources: int,
+                 on_source_added=None, on_source_removed=None, source_factory=SourceBin):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pipeline = pipeline
+        self.streammux = streammux
+        self.max_sources = max_sources
+        self.on_source_added = on_source_added
+        self.on_source_removed = on_source_removed
+        self.source_factory = source_factory
+        self.sources: Dict[int, ManagedSource] = {}
+        self._lock = threading.Lock()
+
+    def list_sources(self) -> List[dict]:
+        with self._lock:
+            return [source.to_dict() for _, source in sorted(self.sources.items())]
+
+    def _free_slot(self) -> int:
+        for source_id in range(self.max_sources):
+            if source_id not in self.sources:
+                return source_id
+        raise PipelineError(f"All {self.max_sources} streammux slots are in use")
+
+    def add_source(self, uri: str, source_id: Optional[int] = None) -> int:
+        with self._lock:
+            if source_id is None:
+                source_id = self._free_slot()
+            elif not 0 <= source_id < self.max_sources:
+                raise PipelineError(f"Source id {source_id} is outside [0, {self.max_sources})")
+            elif source_id in self.sources:
+                raise PipelineError(f"Source id {source_id} is already in use")
+
+            source_bin = self.source_factory(source_id, uri).create()
+            self.pipeline.add(source_bin)
+            sinkpad = self.streammux.request_pad_simple(f"sink_{source_id}")
+            if not sinkpad:
+                self.pipeline.remove(source_bin)
+                raise PipelineError(f"Unable to get sink pad from streammux for source {source_id}")
+            srcpad = source_bin.get_static_pad("src")
+            if srcpad.link(sinkpad) != Gst.PadLinkReturn.OK:
+                self.streammux.release_request_pad(sinkpad)
+                self.pipeline.remove(source_bin)
+                raise PipelineError(f"Unable to link source bin {source_id} to streammux")
+            source = ManagedSource(source_id, uri, source_bin, sinkpad)
+            srcpad.add_probe(Gst.PadProbeType.BUFFER, source.first_buffer_probe, 0)
+            self.sources[source_id] = source
+
+        if self.on_source_added:
+            self.on_source_added(source)
+        # A no-op while the pipeline is still being built; brings a hot-added bin up to PLAYING.
+        source_bin.sync_state_with_parent()
+        self.logger.info("Added source %d: %s", source_id, uri)
+        return source_id
+
+    def add_sources(self, uris: List[str], ready_timeout: float = 10.0,
+                    max_workers: int = 8) -> Dict[int, Optional[float]]:
+        # Brings every source up in parallel under its list index, then waits up to ready_timeout for
+        # first buffers. Returns seconds-to-first-buffer per source, None for those still negotiating.
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="source-add") as executor:
+            futures = [executor.submit(self.add_source, uri, source_id) for source_id, uri in enumerate(uris)]
+        ready = {}
+        for source_id, future in enumerate(futures):
+            try:
+                future.result()
+            except Exception as e:
+                # One bad camera (GLib error, failed link, ...) must not abort the rest of the startup.
+                self.logger.error("Failed to add source %d: %s", source_id, e)
+                continue
+            source = self.sources.get(source_id)
+            remaining = max(0.0, ready_timeout - (time.monotonic() - started))
+            if source and source.ready.wait(remaining):
+                ready[source_id] = source.ready_at - source.added_at
+            else:
+                ready[source_id] = None
+                self.logger.warning("Source %d not streaming after %.1fs; it will join once it starts",
+                                    source_id, ready_timeout)
+        return ready
+
+    def remove_source(self, source_id: int):
+        with self._lock:
+            source = self.sources.pop(source_id, None)
+        if source is None:
+            raise PipelineError(f"Unknown source id {source_id}")
+
+        if source.bin.set_state(Gst.State.NULL) == Gst.StateChangeReturn.ASYNC:
+            source.bin.get_state(Gst.CLOCK_TIME_NONE)
+        source.sinkpad.send_event(Gst.Event.new_flush_stop(False))
+        self.streammux.release_request_pad(source.sinkpad)
+        self.pipeline.remove(source.bin)
+
+        if self.on_source_removed:
+            self.on_source_removed(source_id)
+        self.logger.info("Removed source %d: %s", source_id, source.uri)
+
+    def call_in_main_loop(self, func, *args, timeout: float = 10.0):
+        done = threading.Event()
+        result = {}
+
+        def invoke():
+            try:
+                result['value'] = func(*args)
+            except Exception as e:
+                result['error'] = e
+            done.set()
+            return False
+
+        GLib.idle_add(invoke)
+        if not done.wait(timeout):
+            raise PipelineError(f"Timed out after {timeout}s waiting for the GLib main loop")
+        if 'error' in result:
+            raise result['error']
+        return result['value']
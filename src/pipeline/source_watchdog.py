@@ -0,0 +1,214 @@
+import time
+import random
+import logging
+from typing import Dict, Optional
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+SOURCE_BIN_PREFIX = 'source-bin-'
+
+
+class SourceHealth:
+    __slots__ = ('source_id', 'uri', 'connect_started', 'last_buffer', 'stalled_since', 'recovered_at', 'restarted_at',
+                 'failures', 'reconnects', 'stalls', 'errors', 'last_stall_seconds', 'total_stall_seconds',
+                 'timeout_id')
+
+    def __init__(self, source_id: int, uri: str):
+        self.source_id = source_id
+        self.uri = uri
+        # Stall detection only arms once the first buffer arrives; until then connect_timeout applies.
+        self.connect_started = None
+        self.last_buffer = None
+        self.stalled_since = None
+        self.recovered_at = None
+        self.restarted_at = 0.0
+        self.failures = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.errors = 0
+        self.last_stall_seconds = 0.0
+        self.total_stall_seconds = 0.0
+        self.timeout_id = None
+
+    def to_dict(self, now: float) -> dict:
+        current_stall = now - self.stalled_since if self.stalled_since is not None else 0.0
+        return {
+            'uri': self.uri,
+            'stalled': self.stalled_since is not None,
+            'stall_seconds': current_stall,
+            'last_stall_seconds': self.last_stall_seconds,
+            'total_stall_seconds': self.total_stall_seconds + current_stall,
+            'stalls': self.stalls,
+            'errors': self.errors,
+            'reconnects': self.reconnects,
+        }
+
+
+class SourceWatchdog:
+    def __init__(self, source_manager, stall_timeout: float = 10.0, check_interval_ms: int = 1000,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, stable_seconds: float = 30.0,
+                 connect_timeout: float = 60.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.source_manager = source_manager
+        self.stall_timeout = stall_timeout
+        self.check_interval_ms = check_interval_ms
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.connect_timeout = connect_timeout
+        self.health: Dict[int, SourceHealth] = {}
+        self._restarting = set()
+        self._timeout_id = None
+        self._armed = False
+
+    def watch(self, source):
+        health = self.health.get(source.source_id)
+        if health is None or health.uri != source.uri:
+            health = SourceHealth(source.source_id, source.uri)
+            self.health[source.source_id] = health
+        if self._armed and health.connect_started is None:
+            health.connect_started = time.monotonic()
+
+        def buffer_probe(pad, info, u_data):
+            health.last_buffer = time.monotonic()
+            return Gst.PadProbeReturn.OK
+
+        source.bin.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, buffer_probe, 0)
+
+    def forget(self, source_id: int):
+        if source_id in self._restarting:
+            return
+        health = self.health.pop(source_id, None)
+        if health and health.timeout_id is not None:
+            GLib.source_remove(health.timeout_id)
+
+    def arm(self):
+        # Called once the pipeline reaches PLAYING, so engine builds and preroll do not count as connect time.
+        now = time.monotonic()
+        self._armed = True
+        # The staged startup pool registers sources concurrently; iterate over a snapshot.
+        for health in list(self.health.values()):
+            if health.connect_started is None:
+                health.connect_started = now
+
+    def start(self):
+        if self._timeout_id is None:
+            self._timeout_id = GLib.timeout_add(self.check_interval_ms, self.check)
+
+    def stop(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+        for health in list(self.health.values()):
+            if health.timeout_id is not None:
+                GLib.source_remove(health.timeout_id)
+                health.timeout_id = None
+
+    def check(self) -> bool:
+        now = time.monotonic()
+        for health in list(self.health.values()):
+            if health.timeout_id is not None:
+                continue
+            if health.stalled_since is not None:
+                if health.last_buffer is not None and health.last_buffer > health.stalled_since:
+                    self._recovered(health, now)
+                elif now - health.restarted_at > self._timeout_for(health):
+                    self._schedule_restart(health, f"no buffers {now - health.restarted_at:.1f}s after reconnect")
+            elif health.last_buffer is None:
+                if health.connect_started is not None and now - health.connect_started > self.connect_timeout:
+                    self._mark_stalled(health)
+                    self._schedule_restart(health, f"no buffers {now - health.connect_started:.1f}s after connecting")
+            elif now - health.last_buffer > self.stall_timeout:
+                self._mark_stalled(health)
+                self._schedule_restart(health, f"no buffers for {now - health.last_buffer:.1f}s")
+            elif health.failures and now - health.recovered_at >= self.stable_seconds:
+                health.failures = 0
+        return True
+
+    def handle_error(self, message: Gst.Message) -> bool:
+        source_bin = self._source_bin_of(message.src)
+        if source_bin is None:
+            return False
+        source_id = int(source_bin.get_name()[len(SOURCE_BIN_PREFIX):])
+        health = self.health.get(source_id)
+        current = self.source_manager.sources.get(source_id)
+        if health is None or current is None or current.bin is not source_bin:
+            # Late message from a bin that has already been removed or torn down; never fatal to the pipeline.
+            self.logger.debug("Ignoring error from removed %s", source_bin.get_name())
+            return True
+        err, debug = message.parse_error()
+        health.errors += 1
+        self._mark_stalled(health)
+        self._schedule_restart(health, str(err))
+        return True
+
+    @staticmethod
+    def _source_bin_of(element) -> Optional[Gst.Bin]:
+        while element is not None:
+            name = element.get_name() or ''
+            if name.startswith(SOURCE_BIN_PREFIX) and name[len(SOURCE_BIN_PREFIX):].isdigit():
+                return element
+            element = element.get_parent()
+        return None
+
+    def _timeout_for(self, health: SourceHealth) -> float:
+        return self.stall_timeout if health.last_buffer is not None else self.connect_timeout
+
+    def _mark_stalled(self, health: SourceHealth):
+        if health.stalled_since is None:
+            if health.last_buffer is not None:
+                health.stalled_since = health.last_buffer
+            else:
+                health.stalled_since = health.connect_started or time.monotonic()
+            health.stalls += 1
+
+    def _recovered(self, health: SourceHealth, now: float):
+        health.last_stall_seconds = health.last_buffer - health.stalled_since
+        health.total_stall_seconds += health.last_stall_seconds
+        health.stalled_since = None
+        health.recovered_at = now
+        self.logger.info("Source %d recovered after %.1fs (%d reconnects so far)",
+                         health.source_id, health.last_stall_seconds, health.reconnects)
+
+    def _schedule_restart(self, health: SourceHealth, reason: str):
+        if health.timeout_id is not None:
+            return
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** health.failures))
+        health.failures += 1
+        self.logger.warning("Source %d unhealthy (%s), reconnecting in %.1fs (attempt %d)",
+                            health.source_id, reason, delay, health.failures)
+        health.timeout_id = GLib.timeout_add(int(delay * 1000), self._restart, health.source_id)
+
+    def _restart(self, source_id: int) -> bool:
+        health = self.health.get(source_id)
+        if health is None:
+            return False
+        health.timeout_id = None
+        health.restarted_at = time.monotonic()
+        self._restarting.add(source_id)
+        try:
+            if source_id in self.source_manager.sources:
+                self.source_manager.remove_source(source_id)
+            self.source_manager.add_source(health.uri, source_id)
+        except Exception as e:
+            self.logger.error("Failed to rebuild source %d: %s", source_id, e)
+            self._schedule_restart(health, "rebuild failed")
+        else:
+            health.reconnects += 1
+        finally:
+            self._restarting.discard(source_id)
+        return False
+
+    def stats(self) -> Dict[int, dict]:
+        now = time.monotonic()
+        return {source_id: health.to_dict(now) for source_id, health in sorted(list(self.health.items()))}
+
+    def metrics(self) -> dict:
+        metrics = {}
+        for source_id, stats in self.stats().items():
+            for key in ('reconnects', 'stalls', 'errors', 'stall_seconds', 'total_stall_seconds'):
+                metrics[f'{key}{{source="{source_id}"}}'] = stats[key]
+        return metrics
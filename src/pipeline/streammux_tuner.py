@@ -0,0 +1,256 @@
+import time
+import logging
+import threading
+
+import numpy as np
+
+from ..utils.exceptions import ConfigurationError
+
+
+class ArrivalTrace:
+    def __init__(self, capacity: int = 1 << 16):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.sources = np.zeros(capacity, dtype=np.int32)
+        self.pushes = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+        self._push_count = 0
+
+    def record(self, source_id: int, timestamp: float):
+        i = self._count % self.capacity
+        self.times[i] = timestamp
+        self.sources[i] = source_id
+        self._count += 1
+
+    def record_push(self, timestamp: float):
+        self.pushes[self._push_count % self.capacity] = timestamp
+        self._push_count += 1
+
+    @staticmethod
+    def _ordered(values: np.ndarray, count: int, capacity: int) -> np.ndarray:
+        if count <= capacity:
+            return values[:count].copy()
+        head = count % capacity
+        return np.concatenate([values[head:], values[:head]])
+
+    def snapshot(self, since: float = -np.inf):
+        times = self._ordered(self.times, self._count, self.capacity)
+        sources = self._ordered(self.sources, self._count, self.capacity)
+        pushes = self._ordered(self.pushes, self._push_count, self.capacity)
+        keep = times >= since
+        return times[keep], sources[keep], pushes[pushes >= since]
+
+    def save(self, path, since: float = -np.inf):
+        times, sources, pushes = self.snapshot(since)
+        np.savez(path, times=times, sources=sources, pushes=pushes)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            return data['times'], data['sources'], data['pushes']
+
+
+def _latency_stats(latencies: np.ndarray) -> dict:
+    if latencies.size == 0:
+        return {'latency_mean': 0.0, 'latency_p95': 0.0, 'latency_p99': 0.0}
+    p95, p99 = np.percentile(latencies, (95, 99))
+    return {'latency_mean': float(latencies.mean()), 'latency_p95': float(p95), 'latency_p99': float(p99)}
+
+
+def simulate_batching(times: np.ndarray, batch_size: int, timeout: float) -> dict:
+    # A batch opens at its first frame and is pushed when full or when the push timeout expires.
+    times = np.sort(times)
+    n = times.size
+    deadlines = np.searchsorted(times, times + timeout, side='right')
+    push_times = []
+    counts = []
+    start = 0
+    while start < n:
+        end = min(start + batch_size, deadlines[start])
+        push_times.append(times[end - 1] if end - start == batch_size else times[start] + timeout)
+        counts.append(end - start)
+        start = end
+    counts = np.asarray(counts, dtype=np.int64)
+    latencies = np.repeat(np.asarray(push_times), counts) - times
+    return {
+        'batch_size': batch_size,
+        'timeout': timeout,
+        'batches': int(counts.size),
+        'frames_per_batch': float(counts.mean()) if counts.size else 0.0,
+        'fill_ratio': float(counts.mean() / batch_size) if counts.size else 0.0,
+        **_latency_stats(latencies),
+    }
+
+
+def observed_batching(times: np.ndarray, pushes: np.ndarray, batch_size: int) -> dict:
+    # Attribute each arrival to the first batch pushed at or after it.
+    times = np.sort(times)
+    pushes = np.sort(pushes)
+    batch_index = np.searchsorted(pushes, times, side='left')
+    pushed = batch_index < pushes.size
+    counts = np.bincount(batch_index[pushed], minlength=pushes.size)
+    counts = counts[counts > 0]
+    latencies = pushes[batch_index[pushed]] - times[pushed]
+    return {
+        'batch_size': batch_size,
+        'batches': int(counts.size),
+        'frames_per_batch': float(counts.mean()) if counts.size else 0.0,
+        'fill_ratio': float(counts.mean() / batch_size) if counts.size else 0.0,
+        **_latency_stats(latencies),
+    }
+
+
+def source_intervals(times: np.ndarray, sources: np.ndarray) -> dict:
+    intervals = {}
+    for source_id in np.unique(sources).tolist():
+        source_times = np.sort(times[sources == source_id])
+        if source_times.size > 1:
+            intervals[source_id] = float(np.median(np.diff(source_times)))
+    return intervals
+
+
+def candidate_batch_sizes(max_sources: int, active_sources: int) -> list:
+    sizes = {max_sources, max(1, active_sources)}
+    size = 2
+    while size < max_sources:
+        sizes.add(size)
+        size *= 2
+    return sorted(sizes)
+
+
+def candidate_timeouts(intervals: dict, max_latency: float, steps: int = 16) -> np.ndarray:
+    longest = max(intervals.values()) if intervals else max_latency
+    upper = max(min(2 * longest, 4 * max_latency), 1e-3)
+    grid = np.append(np.geomspace(1e-3, upper, steps), [max_latency, *intervals.values()])
+    return np.unique(np.round(grid[grid <= upper], 4))
+
+
+def tune_streammux(times: np.ndarray, sources: np.ndarray, max_sources: int, max_latency: float,
+                   current_batch_size: int = None, batch_sizes=None, timeouts=None) -> dict:
+    if times.size == 0:
+        raise ConfigurationError("Cannot tune streammux without any recorded frame arrivals")
+    intervals = source_intervals(times, sources)
+    batch_sizes = batch_sizes or candidate_batch_sizes(max_sources, len(intervals))
+    timeouts = candidate_timeouts(intervals, max_latency) if timeouts is None else timeouts
+    results = [simulate_batching(times, batch_size, float(timeout))
+               for batch_size in batch_sizes for timeout in timeouts]
+
+    def best(candidates):
+        feasible = [r for r in candidates if r['latency_p95'] <= max_latency]
+        if not feasible:
+            return min(candidates, key=lambda r: r['latency_p95'])
+        # Larger batches are what buys GPU throughput; fill and latency break ties.
+        return max(feasible, key=lambda r: (round(r['frames_per_batch'], 1), r['fill_ratio'], -r['latency_p95']))
+
+    current_batch_size = current_batch_size or max_sources
+    current = [r for r in results if r['batch_size'] == current_batch_size] \
+        or [simulate_batching(times, current_batch_size, float(t)) for t in timeouts]
+    return {
+        'source_intervals': intervals,
+        'recommended': best(results),
+        'current_batch_size': best(current),
+        'candidates': results,
+    }
+
+
+class StreammuxTuner:
+    def __init__(self, streammux, batch_size: int, max_latency: float = 0.05, window_seconds: float = 30.0,
+                 tune_interval: float = 60.0, apply: bool = True, trace_path: str = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.streammux = streammux
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.window_seconds = window_seconds
+        self.tune_interval = tune_interval
+        self.apply = apply
+        self.trace_path = trace_path
+        self.trace = ArrivalTrace()
+        self.result = None
+        self.observed = None
+        self._timeout_id = None
+        self._tuning = False
+
+    def attach_source(self, source_id: int, sinkpad):
+        from gi.repository import Gst
+
+        def arrival_probe(pad, info, u_data):
+            self.trace.record(source_id, time.monotonic())
+            return Gst.PadProbeReturn.OK
+
+        sinkpad.add_probe(Gst.PadProbeType.BUFFER, arrival_probe, 0)
+
+    def attach_output(self, srcpad):
+        from gi.repository import Gst
+
+        def push_probe(pad, info, u_data):
+            self.trace.record_push(time.monotonic())
+            return Gst.PadProbeReturn.OK
+
+        srcpad.add_probe(Gst.PadProbeType.BUFFER, push_probe, 0)
+
+    def start(self):
+        from gi.repository import GLib
+        if self._timeout_id is None:
+            self._timeout_id = GLib.timeout_add(int(self.tune_interval * 1000), self._schedule_tune)
+
+    def stop(self):
+        from gi.repository import GLib
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _schedule_tune(self) -> bool:
+        if not self._tuning:
+            self._tuning = True
+            threading.Thread(target=self._tune, name="streammux-tuner", daemon=True).start()
+        return True
+
+    def _tune(self):
+        try:
+            since = time.monotonic() - self.window_seconds
+            times, sources, pushes = self.trace.snapshot(since)
+            if times.size == 0:
+                return
+            if self.trace_path:
+                self.trace.save(self.trace_path, since)
+            self.observed = observed_batching(times, pushes, self.batch_size)
+            self.result = tune_streammux(times, sources, self.batch_size, self.max_latency,
+                                         current_batch_size=self.batch_size)
+            self.report()
+            if self.apply:
+                from gi.repository import GLib
+                GLib.idle_add(self._apply_timeout, self.result['current_batch_size']['timeout'])
+        except Exception as e:
+            self.logger.exception("Streammux tuning failed: %s", e)
+        finally:
+            self._tuning = False
+
+    def _apply_timeout(self, timeout: float) -> bool:
+        timeout_us = int(timeout * 1e6)
+        if self.streammux.get_property('batched-push-timeout') != timeout_us:
+            self.streammux.set_property('batched-push-timeout', timeout_us)
+            self.logger.info("Set streammux batched-push-timeout to %d us", timeout_us)
+        return False
+
+    def report(self):
+        observed = self.observed
+        current = self.result['current_batch_size']
+        recommended = self.result['recommended']
+        self.logger.info("Streammux observed: fill %.2f, mux latency p95 %.1f ms; best timeout for batch-size %d: "
+                         "%.1f ms (fill %.2f, p95 %.1f ms)", observed['fill_ratio'], observed['latency_p95'] * 1000,
+                         self.batch_size, current['timeout'] * 1000, current['fill_ratio'],
+                         current['latency_p95'] * 1000)
+        if recommended['batch_size'] != self.batch_size:
+            self.logger.info("Recommended streammux batch-size %d with timeout %.1f ms (fill %.2f, p95 %.1f ms)",
+                             recommended['batch_size'], recommended['timeout'] * 1000, recommended['fill_ratio'],
+                             recommended['latency_p95'] * 1000)
+
+    def stats(self) -> dict:
+        if self.observed is None:
+            return {}
+        return {
+            'observed_fill_ratio': self.observed['fill_ratio'],
+            'observed_latency_p95_seconds': self.observed['latency_p95'],
+            'push_timeout_seconds': self.result['current_batch_size']['timeout'],
+            'recommended_batch_size': self.result['recommended']['batch_size'],
+        }
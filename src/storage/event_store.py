@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+
+import numpy as np
+
+from ..analytics.track_state import ALARM_RULES
+from ..utils.exceptions import ConfigurationError
+
+INDEX_FILE = 'index.json'
+TABLES = {
+    'occupancy': (
+        ('timestamp', np.dtype('<f8')),
+        ('source_id', np.dtype('<i4')),
+        ('frame_num', np.dtype('<i8')),
+        ('object_count', np.dtype('<i4')),
+        ('roi_count', np.dtype('<i4')),
+    ),
+    'alarms': (
+        ('timestamp', np.dtype('<f8')),
+        ('source_id', np.dtype('<i4')),
+        ('rule', np.dtype('u1')),
+    ),
+}
+# Alarm rule codes: 0 is the occupancy alarm, track rules follow in ALARM_RULES order.
+ALARM_RULE_CODES = ('occupancy',) + ALARM_RULES
+
+
+def _allocate(table: str, capacity: int) -> dict:
+    return {name: np.zeros(capacity, dtype=dtype) for name, dtype in TABLES[table]}
+
+
+def _partition_name(start: float) -> str:
+    return time.strftime('%Y%m%dT%H%M%S', time.gmtime(start))
+
+
+def _load_index(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_index(path: str, index: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class _TableBuffer:
+    # Two preallocated column sets: the pipeline fills one while the writer drains the other.
+    def __init__(self, table: str, capacity: int):
+        self.table = table
+        self.capacity = capacity
+        self.active = _allocate(table, capacity)
+        self.spare = _allocate(table, capacity)
+        self.count = 0
+        self.pending = None
+        self.pending_count = 0
+        self.dropped = 0
+
+    def reserve(self, rows: int) -> bool:
+        # Never blocks: when both buffers are full the rows are dropped and counted.
+        if self.count + rows <= self.capacity:
+            return True
+        if rows > self.capacity or not self.swap():
+            self.dropped += rows
+            return False
+        return True
+
+    def swap(self) -> bool:
+        if self.pending is not None:
+            return False
+        self.pending, self.pending_count = self.active, self.count
+        self.active, self.spare = self.spare, None
+        self.count = 0
+        return True
+
+    def release(self, columns: dict):
+        self.spare = columns
+        self.pending = None
+        self.pending_count = 0
+
+
+class EventStore:
+    def __init__(self, path: str, flush_interval: float = 1.0, buffer_rows: int = 65536,
+                 partition_seconds: float = 3600, retention_hours: float = 168,
+                 retention_interval: float = 300):
+        if buffer_rows < 1 or partition_seconds <= 0:
+            raise ConfigurationError("Event store buffer-rows and partition-seconds must be positive")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.partition_seconds = partition_seconds
+        self.retention_hours = retention_hours
+        self.retention_interval = retention_interval
+        self._buffers = {table: _TableBuffer(table, buffer_rows) for table in TABLES}
+        self._indexes = {}
+        for table in TABLES:
+            os.makedirs(os.path.join(path, table), exist_ok=True)
+            self._indexes[table] = _load_index(os.path.join(path, table, INDEX_FILE))
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._last_retention = 0.0
+        self.counters = {'rows_written': 0, 'flushes': 0, 'partitions_removed': 0, 'write_errors': 0}
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self._thread.start()
+
+    def consume(self, records):
+        n = records.num_frames
+        if n == 0:
+            return
+        buffer = self._buffers['occupancy']
+        with self._lock:
+            if not buffer.reserve(n):
+                return
+            r0, r1 = buffer.count, buffer.count + n
+            frames = records.frames()
+            columns = buffer.active
+            columns['timestamp'][r0:r1] = records.timestamp
+            for name in ('source_id', 'frame_num', 'object_count', 'roi_count'):
+                columns[name][r0:r1] = frames[name]
+            buffer.count = r1
+            if buffer.pending is not None:
+                self._wakeup.notify()
+
+    def record_alarm(self, timestamp: float, source_id: int, rule: str = None):
+        buffer = self._buffers['alarms']
+        with self._lock:
+            if not buffer.reserve(1):
+                return
+            i = buffer.count
+            buffer.active['timestamp'][i] = timestamp
+            buffer.active['source_id'][i] = source_id
+            buffer.active['rule'][i] = ALARM_RULE_CODES.index(rule or 'occupancy')
+            buffer.count = i + 1
+            if buffer.pending is not None:
+                self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._running and not any(b.pending is not None for b in self._buffers.values()):
+                    self._wakeup.wait(self.flush_interval)
+                running = self._running
+                for buffer in self._buffers.values():
+                    if buffer.pending is None and buffer.count:
+                        buffer.swap()
+                batches = [(b, b.pending, b.pending_count) for b in self._buffers.values() if b.pending is not None]
+            for buffer, columns, count in batches:
+                try:
+                    self._write(buffer.table, columns, count)
+                except OSError as e:
+                    self.counters['write_errors'] += 1
+                    self.logger.error("Failed to write %d %s rows: %s", count, buffer.table, e)
+                with self._lock:
+                    buffer.release(columns)
+            if time.time() - self._last_retention >= self.retention_interval:
+                self._last_retention = time.time()
+                try:
+                    self.apply_retention()
+                except OSError as e:
+                    self.logger.error("Event store retention cleanup failed: %s", e)
+            if not running:
+                with self._lock:
+                    if not any(b.count for b in self._buffers.values()):
+                        return
+
+    def _write(self, table: str, columns: dict, count: int):
+        timestamps = columns['timestamp'][:count]
+        order = np.argsort(timestamps, kind='stable')
+        starts = np.floor(timestamps[order] / self.partition_seconds) * self.partition_seconds
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1, [count])).tolist()
+        index = self._indexes[table]
+        for p0, p1 in zip(bounds[:-1], bounds[1:]):
+            rows = order[p0:p1]
+            name = _partition_name(float(starts[p0]))
+            directory = os.path.join(self.path, table, name)
+            os.makedirs(directory, exist_ok=True)
+            entry = index.get(name) or {'start': float(starts[p0]), 'end': float(starts[p0]) + self.partition_seconds,
+                                        'rows': 0, 't_min': None, 't_max': None, 'sorted': True, 'sources': {}}
+            # Columns are appended past the indexed row count; readers only trust the index, so a
+            # crash between the column writes and the index update leaves a readable prefix.
+            for column, _ in TABLES[table]:
+                with open(os.path.join(directory, f"{column}.bin"), 'r+b' if entry['rows'] else 'wb') as f:
+                    f.seek(entry['rows'] * columns[column].dtype.itemsize)
+                    f.write(columns[column][rows].tobytes())
+                    f.truncate()
+            batch_times = timestamps[rows]
+            t_min, t_max = float(batch_times[0]), float(batch_times[-1])
+            if entry['t_max'] is not None and t_min < entry['t_max']:
+                entry['sorted'] = False
+            entry['t_min'] = t_min if entry['t_min'] is None else min(entry['t_min'], t_min)
+            entry['t_max'] = t_max if entry['t_max'] is None else max(entry['t_max'], t_max)
+            entry['rows'] += rows.size
+            sources, counts = np.unique(columns['source_id'][rows], return_counts=True)
+            for source_id, source_rows in zip(sources.tolist(), counts.tolist()):
+                entry['sources'][str(source_id)] = entry['sources'].get(str(source_id), 0) + source_rows
+            index[name] = entry
+        _write_index(os.path.join(self.path, table, INDEX_FILE), index)
+        self.counters['rows_written'] += count
+        self.counters['flushes'] += 1
+
+    def apply_retention(self, now: float = None):
+        if not self.retention_hours:
+            return
+        cutoff = (time.time() if now is None else now) - self.retention_hours * 3600
+        for table in TABLES:
+            index = self._indexes[table]
+            expired = [name for name, entry in index.items() if entry['end'] <= cutoff]
+            if not expired:
+                continue
+            for name in expired:
+                del index[name]
+            _write_index(os.path.join(self.path, table, INDEX_FILE), index)
+            for name in expired:
+                shutil.rmtree(os.path.join(self.path, table, name), ignore_errors=True)
+            self.counters['partitions_removed'] += len(expired)
+            self.logger.info("Removed %d expired %s partitions", len(expired), table)
+
+    def flush(self, timeout: float = 5.0):
+        # Blocks until everything buffered before the call is on disk.
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not any(b.count or b.pending is not None for b in self._buffers.values()):
+                    return True
+                self._wakeup.notify()
+            time.sleep(0.01)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'buffered_rows': sum(b.count + b.pending_count for b in self._buffers.values()),
+            'dropped_rows': sum(b.dropped for b in self._buffers.values()),
+        }
+
+    def close(self):
+        if not self._running:
+            return
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        self._thread.join()
+        dropped = sum(b.dropped for b in self._buffers.values())
+        self.logger.info("Event store wrote %d rows to %s (%d dropped)", self.counters['rows_written'],
+                         self.path, dropped)
+
+
+class EventStoreReader:
+    def __init__(self, path: str):
+        if not os.path.isdir(path):
+            raise ConfigurationError(f"Event store directory {path} does not exist")
+        self.path = path
+
+    def partitions(self, table: str, start: float = -np.inf, end: float = np.inf, source_ids=None) -> list:
+        if table not in TABLES:
+            raise ConfigurationError(f"Unknown event table '{table}', expected one of {list(TABLES)}")
+        index = _load_index(os.path.join(self.path, table, INDEX_FILE))
+        wanted = None if source_ids is None else {str(source_id) for source_id in source_ids}
+        selected = []
+        for name, entry in sorted(index.items()):
+            if entry['rows'] == 0 or entry['t_max'] < start or entry['t_min'] >= end:
+                continue
+            if wanted is not None and wanted.isdisjoint(entry['sources']):
+                continue
+            selected.append((name, entry))
+        return selected
+
+    def _columns(self, table: str, name: str, rows: int) -> dict:
+        directory = os.path.join(self.path, table, name)
+        return {column: np.memmap(os.path.join(directory, f"{column}.bin"), dtype=dtype, mode='r', shape=(rows,))
+                for column, dtype in TABLES[table]}
+
+    def query(self, table: str, start: float = -np.inf, end: float = np.inf, source_ids=None) -> dict:
+        # Rows with start <= timestamp < end, optionally restricted to source_ids, in partition order.
+        parts = {column: [] for column, _ in TABLES[table]}
+        for name, entry in self.partitions(table, start, end, source_ids):
+            columns = self._columns(table, name, entry['rows'])
+            timestamps = columns['timestamp']
+            if entry['sorted']:
+                r0, r1 = np.searchsorted(timestamps, (start, end), side='left').tolist()
+                selection = slice(r0, r1)
+                keep = None
+            else:
+                selection = slice(None)
+                keep = (timestamps >= start) & (timestamps < end)
+            if source_ids is not None:
+                in_sources = np.isin(columns['source_id'][selection], list(source_ids))
+                keep = in_sources if keep is None else keep & in_sources
+            for column, values in columns.items():
+                values = values[selection]
+                parts[column].append(np.array(values if keep is None else values[keep]))
+        return {column: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+                for (column, dtype), chunks in zip(TABLES[table], parts.values())}
@@ -0,0 +1,334 @@
+import os
+import sys
+import time
+import random
+import signal
+import struct
+import asyncio
+import logging
+import argparse
+import dataclasses
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from queue import Queue
+from typing import Dict, List, Optional
+
+from .analytics.track_state import ALARM_RULES
+from .utils.config_loader import ConfigLoader, CONFIG_ENV_VAR
+from .utils.config_model import AppConfig
+from .utils.exceptions import ConfigurationError
+from .utils.logger import setup_logging
+
+BACKENDS = ('pyds', 'fake')
+
+# kind, shard index, shard-local source id, timestamp, value (frames, or 1 + index into ALARM_RULES)
+EVENT = struct.Struct('<BHHdd')
+EVENT_ALARM = 1
+EVENT_HEARTBEAT = 2
+
+
+class ShardChannel:
+    # Worker-side end of the event pipe; also serves as the analytics worker's alarm sink.
+    def __init__(self, conn, shard_index: int):
+        self.conn = conn
+        self.shard_index = shard_index
+        self._lock = threading.Lock()
+
+    def _send(self, kind: int, source_id: int, value: float):
+        payload = EVENT.pack(kind, self.shard_index, source_id, time.time(), value)
+        with self._lock:
+            self.conn.send_bytes(payload)
+
+    def submit(self, key: str):
+        _, source_id, *rule = key.split('-', 2)
+        self._send(EVENT_ALARM, int(source_id), ALARM_RULES.index(rule[0]) + 1.0 if rule else 0.0)
+
+    def heartbeat(self, frames: float):
+        self._send(EVENT_HEARTBEAT, 0, frames)
+
+
+def shard_config(config: AppConfig, shard_index: int, uris: List[str], num_shards: int) -> AppConfig:
+    max_sources = max(len(uris), -(-config.max_sources // num_shards))
+    return dataclasses.replace(
+        config,
+        sources=uris,
+        streammux=dataclasses.replace(config.streammux, max_sources=max_sources),
+        instrumentation=dataclasses.replace(config.instrumentation,
+                                            port=config.instrumentation.port + shard_index),
+        control=dataclasses.replace(config.control, port=config.control.port + shard_index),
+        storage=dataclasses.replace(config.storage, path=os.path.join(config.storage.path, f"shard-{shard_index}")),
+    )
+
+
+def _run_shard(shard_index: int, num_shards: int, config_path: str, uris: List[str], conn,
+               backend: str, fake_fps: float):
+    config = shard_config(ConfigLoader.load(config_path), shard_index, uris, num_shards)
+    channel = ShardChannel(conn, shard_index)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if backend == 'fake':
+        _run_fake_shard(config, shard_index, channel, fake_fps)
+        return
+
+    from .app import LogiScanRLCApp
+    app = LogiScanRLCApp(config=config, alarm_sink=channel)
+
+    def heartbeat():
+        while True:
+            builder = app.pipeline_builder
+            channel.heartbeat(builder.handoff_queue.popped if builder else 0)
+            time.sleep(config.supervisor.heartbeat_interval)
+
+    threading.Thread(target=heartbeat, name="shard-heartbeat", daemon=True).start()
+    sys.exit(app.run())
+
+
+def _run_fake_shard(config: AppConfig, shard_index: int, channel: ShardChannel, fps: float):
+    from .analytics.analytics_worker import AnalyticsWorker
+    from .analytics.fake_batch_meta import FakeBatchExtractor
+    from .analytics.occupancy import RoiOccupancyEngine
+    from .analytics.track_state import TrackStateTable
+
+    setup_logging(config.logging)
+    analytics = config.analytics
+    engine = RoiOccupancyEngine(
+        threshold_count=analytics.threshold_count,
+        window_seconds=analytics.window_seconds,
+        statistic=analytics.statistic,
+        percentile=analytics.percentile,
+        min_samples=analytics.min_samples,
+        history_size=analytics.history_size
+    )
+    track_state = None
+    if analytics.track_state:
+        track_state = TrackStateTable(
+            ttl_seconds=analytics.track_ttl,
+            dwell_seconds=analytics.dwell_seconds,
+            unique_window=analytics.unique_window,
+            unique_min=analytics.unique_min,
+            unique_max=analytics.unique_max,
+            max_tracks=analytics.max_tracks
+        )
+    worker = AnalyticsWorker(None, engine, channel, check_interval_seconds=analytics.check_interval,
+                             track_state=track_state)
+    extractor = FakeBatchExtractor(num_sources=len(config.sources), seed=shard_index)
+    frames = 0
+    next_batch = next_heartbeat = time.monotonic()
+    while True:
+        records = extractor.extract(None, time.time())
+        worker.process(records)
+        frames += records.num_frames
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            channel.heartbeat(frames)
+            next_heartbeat = now + config.supervisor.heartbeat_interval
+        next_batch += 1.0 / fps
+        time.sleep(max(0.0, next_batch - time.monotonic()))
+
+
+class Shard:
+    __slots__ = ('index', 'source_ids', 'uris', 'process', 'conn', 'started_at', 'last_heartbeat',
+                 'restart_at', 'failures', 'restarts', 'alarms', 'frames')
+
+    def __init__(self, index: int, source_ids: List[int], uris: List[str]):
+        self.index = index
+        self.source_ids = source_ids
+        self.uris = uris
+        self.process = None
+        self.conn = None
+        self.started_at = 0.0
+        self.last_heartbeat = 0.0
+        self.restart_at = None
+        self.failures = 0
+        self.restarts = 0
+        self.alarms = 0
+        self.frames = 0
+
+    def global_key(self, local_id: int, rule: int = 0) -> str:
+        if local_id < len(self.source_ids):
+            key = f"source-{self.source_ids[local_id]}"
+        else:
+            key = f"shard-{self.index}-source-{local_id}"
+        return f"{key}-{ALARM_RULES[rule - 1]}" if rule else key
+
+
+class Supervisor:
+    def __init__(self, config_path, config: AppConfig, workers: Optional[int] = None, backend: str = 'pyds',
+                 fake_fps: float = 25.0, alarm_sink=None):
+        if backend not in BACKENDS:
+            raise ConfigurationError(f"Unknown supervisor backend '{backend}', expected one of {BACKENDS}")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config_path = str(config_path)
+        self.config = config
+        self.settings = config.supervisor
+        self.backend = backend
+        self.fake_fps = fake_fps
+        self.alarm_sink = alarm_sink
+        self.alarm_client = None
+        self.event_loop = None
+        self._context = multiprocessing.get_context('spawn')
+        self._running = False
+
+        num_workers = min(workers or self.settings.workers, len(config.sources))
+        self.shards = [Shard(i, list(range(i, len(config.sources), num_workers)), config.sources[i::num_workers])
+                       for i in range(num_workers)]
+
+    def _start_alarm_dispatcher(self):
+        from .alerts.alarm_client import AlarmClient
+        from .alerts.alarm_dispatcher import AlarmDispatcher
+
+        loop_queue = Queue()
+        def run_event_loop():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop_queue.put(loop)
+            loop.run_forever()
+
+        threading.Thread(target=run_event_loop, name="alarm-loop", daemon=True).start()
+        self.event_loop = loop_queue.get()
+        alarm = self.config.alarm
+        self.alarm_client = AlarmClient(alarm.uri, username=alarm.username, password=alarm.password,
+                                        token_ttl=alarm.token_ttl, status_ttl=alarm.status_ttl)
+        self.alarm_sink = AlarmDispatcher(self.alarm_client, self.event_loop,
+                                          coalesce_window=alarm.coalesce_window,
+                                          max_retries=alarm.max_retries,
+                                          retry_base_delay=alarm.retry_base_delay,
+                                          retry_max_delay=alarm.retry_max_delay)
+
+    def _start_shard(self, shard: Shard):
+        reader, writer = self._context.Pipe(duplex=False)
+        shard.process = self._context.Process(
+            target=_run_shard,
+            args=(shard.index, len(self.shards), self.config_path, shard.uris, writer, self.backend, self.fake_fps),
+            name=f"shard-{shard.index}",
+            daemon=True
+        )
+        shard.process.start()
+        writer.close()
+        shard.conn = reader
+        shard.started_at = shard.last_heartbeat = time.monotonic()
+        shard.restart_at = None
+        self.logger.info("Started shard %d (pid %d) with sources %s", shard.index, shard.process.pid, shard.source_ids)
+
+    def _on_shard_exit(self, shard: Shard):
+        exitcode = shard.process.exitcode
+        shard.process = None
+        if shard.conn is not None:
+            shard.conn.close()
+            shard.conn = None
+        if not self._running:
+            return
+        now = time.monotonic()
+        if now - shard.started_at >= self.settings.stable_seconds:
+            shard.failures = 0
+        delay = random.uniform(0, min(self.settings.restart_backoff_max,
+                                      self.settings.restart_backoff_base * 2 ** shard.failures))
+        shard.failures += 1
+        shard.restart_at = now + delay
+        self.logger.error("Shard %d exited with code %s, restarting in %.1fs", shard.index, exitcode, delay)
+
+    def _drain(self, shard: Shard):
+        try:
+            while shard.conn.poll():
+                kind, _, source_id, _, value = EVENT.unpack(shard.conn.recv_bytes())
+                if kind == EVENT_ALARM:
+                    shard.alarms += 1
+                    self.alarm_sink.submit(shard.global_key(source_id, int(value)))
+                elif kind == EVENT_HEARTBEAT:
+                    shard.last_heartbeat = time.monotonic()
+                    shard.frames = int(value)
+        except (EOFError, OSError):
+            shard.conn.close()
+            shard.conn = None
+
+    def run(self, duration: Optional[float] = None) -> Dict[int, dict]:
+        if self.alarm_sink is None:
+            self._start_alarm_dispatcher()
+        self._running = True
+        deadline = time.monotonic() + duration if duration else None
+        for shard in self.shards:
+            self._start_shard(shard)
+
+        while self._running and (deadline is None or time.monotonic() < deadline):
+            handles = {}
+            for shard in self.shards:
+                if shard.conn is not None:
+                    handles[shard.conn] = shard
+                if shard.process is not None:
+                    handles[shard.process.sentinel] = shard
+            for ready in wait(list(handles), timeout=0.5):
+                shard = handles[ready]
+                if ready is shard.conn:
+                    self._drain(shard)
+                elif shard.process is not None and ready == shard.process.sentinel:
+                    shard.process.join()
+                    if shard.conn is not None:
+                        self._drain(shard)
+                    self._on_shard_exit(shard)
+
+            now = time.monotonic()
+            for shard in self.shards:
+                if shard.process is None:
+                    if shard.restart_at is not None and now >= shard.restart_at:
+                        shard.restarts += 1
+                        self._start_shard(shard)
+                elif now - shard.last_heartbeat > self.settings.heartbeat_timeout:
+                    self.logger.error("Shard %d missed heartbeats for %.1fs, terminating it", shard.index,
+                                      now - shard.last_heartbeat)
+                    shard.process.terminate()
+                    shard.last_heartbeat = now
+
+        self.stop()
+        return self.stats()
+
+    def request_stop(self):
+        self._running = False
+
+    def stop(self):
+        self._running = False
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.terminate()
+                shard.process.join(5)
+                shard.process = None
+            if shard.conn is not None:
+                shard.conn.close()
+                shard.conn = None
+        if self.alarm_client is not None and self.event_loop.is_running():
+            async def close():
+                await self.alarm_sink.aclose()
+                await self.alarm_client.aclose()
+            try:
+                asyncio.run_coroutine_threadsafe(close(), self.event_loop).result(timeout=5)
+            except Exception as e:
+                self.logger.warning("Failed to close alarm client: %s", e)
+            self.logger.info("Alarm dispatcher stats: %s", self.alarm_sink.stats())
+            self.event_loop.call_soon_threadsafe(self.event_loop.stop)
+            self.alarm_client = None
+
+    def stats(self) -> Dict[int, dict]:
+        return {shard.index: {'sources': shard.source_ids, 'restarts': shard.restarts,
+                              'alarms': shard.alarms, 'frames': shard.frames}
+                for shard in self.shards}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run LogiScanRLC pipelines sharded across worker processes")
+    parser.add_argument('--config', help=f"pipeline configuration YAML (default: ${CONFIG_ENV_VAR} or config/pipeline_config.yaml)")
+    parser.add_argument('--workers', type=int, help="number of worker processes (default: pipeline.supervisor.workers)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pyds',
+                        help="'fake' runs synthetic analytics without GStreamer")
+    parser.add_argument('--fake-fps', type=float, default=25.0, help="batches per second per fake shard")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    setup_logging()
+    config_path = ConfigLoader.resolve_path(args.config)
+    config = ConfigLoader.load(config_path)
+    setup_logging(config.logging)
+    supervisor = Supervisor(config_path, config, workers=args.workers, backend=args.backend,
+                            fake_fps=args.fake_fps)
+    signal.signal(signal.SIGINT, lambda signum, frame: supervisor.request_stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: supervisor.request_stop())
+    stats = supervisor.run(args.duration)
+    logging.getLogger("Supervisor").info("Shard stats: %s", stats)
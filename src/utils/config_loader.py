@@ -1,11 +1,27 @@
+import os
 import yaml
 from pathlib import Path
+from typing import Optional
+from ..utils.config_model import AppConfig
 from ..utils.exceptions import ConfigurationError
 
+CONFIG_ENV_VAR = "LOGISCAN_CONFIG"
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "pipeline_config.yaml"
+
 
 class ConfigLoader:
+    _cache = {}
+
+    @staticmethod
+    def resolve_path(cli_path: Optional[str] = None) -> Path:
+        if cli_path:
+            return Path(cli_path)
+        if os.environ.get(CONFIG_ENV_VAR):
+            return Path(os.environ[CONFIG_ENV_VAR])
+        return DEFAULT_CONFIG_PATH
+
     @staticmethod
-    def load(config_path: Path) -> dict:
+    def load_raw(config_path: Path) -> dict:
         try:
             with open(config_path, 'r') as file:
                 return yaml.safe_load(file)
@@ -13,3 +29,17 @@ class ConfigLoader:
             raise ConfigurationError(f"Error parsing YAML file: {e}")
         except Exception as e:
             raise ConfigurationError(f"Error loading configuration file: {e}")
+
+    @staticmethod
+    def load(config_path: Path) -> AppConfig:
+        path = Path(config_path).resolve()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError as e:
+            raise ConfigurationError(f"Error loading configuration file: {e}")
+        cached = ConfigLoader._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        config = AppConfig.from_dict(ConfigLoader.load_raw(path))
+        ConfigLoader._cache[path] = (mtime, config)
+        return config
@@ -0,0 +1,344 @@
+import configparser
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+from ..analytics.handoff_queue import OVERFLOW_POLICIES
+from ..analytics.occupancy import STATISTICS
+from ..analytics.roi_engine import ANCHORS
+from ..pipeline.pipeline_config import PROFILES, SUBSTITUTIONS
+from ..utils.exceptions import ConfigurationError
+from ..utils.logger import LOG_FORMATS
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+TRACKER_PROPERTIES = {
+    'tracker-width': ('tracker-width', int),
+    'tracker-height': ('tracker-height', int),
+    'gpu-id': ('gpu_id', int),
+    'll-lib-file': ('ll-lib-file', str),
+    'll-config-file': ('ll-config-file', str),
+}
+
+
+@dataclass(frozen=True)
+class StreammuxTunerConfig:
+    enable: bool = False
+    apply: bool = True
+    max_latency_ms: float = 50
+    window_seconds: float = 30
+    tune_interval: float = 60
+    trace_path: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class StreammuxConfig:
+    width: int = 1920
+    height: int = 1080
+    batch_timeout: int = 400000
+    max_sources: Optional[int] = None
+    tuner: StreammuxTunerConfig = field(default_factory=StreammuxTunerConfig)
+
+
+@dataclass(frozen=True)
+class InferenceScheduleConfig:
+    enable: bool = False
+    min_interval: int = 0
+    max_interval: int = 4
+    quiet_seconds: float = 10
+    count_delta: int = 1
+    new_tracks: int = 1
+
+
+@dataclass(frozen=True)
+class PgieConfig:
+    config_file: str
+    engine_cache_dir: Optional[str] = None
+    engine_cache_max_mb: int = 8192
+    schedule: InferenceScheduleConfig = field(default_factory=InferenceScheduleConfig)
+
+
+@dataclass(frozen=True)
+class TrackerConfig:
+    config_file: str
+    properties: Dict[str, Union[int, str]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class NvdsAnalyticsConfig:
+    config_file: str
+
+
+@dataclass(frozen=True)
+class TilerConfig:
+    width: int = 1280
+    height: int = 720
+
+
+@dataclass(frozen=True)
+class AnalyticsConfig:
+    threshold_count: float = 4
+    check_interval: float = 30
+    window_seconds: float = 30
+    statistic: str = 'mean'
+    percentile: float = 10
+    min_samples: int = 1
+    history_size: int = 2048
+    metadata_backend: str = 'pyds'
+    queue_size: int = 64
+    overflow_policy: str = 'drop-oldest'
+    record_path: Optional[str] = None
+    record_chunk_frames: int = 4096
+    roi_monitor: bool = False
+    roi_anchor: str = 'bottom-center'
+    roi_report_interval: float = 60
+    track_state: bool = False
+    track_ttl: float = 30
+    max_tracks: int = 65536
+    dwell_seconds: Optional[float] = None
+    unique_window: float = 300
+    unique_min: Optional[int] = None
+    unique_max: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AlarmConfig:
+    uri: str
+    username: str = 'admin'
+    password: str = 'adminpass'
+    token_ttl: float = 300
+    status_ttl: float = 0
+    coalesce_window: float = 30
+    max_retries: int = 5
+    retry_base_delay: float = 1
+    retry_max_delay: float = 60
+
+
+@dataclass(frozen=True)
+class InstrumentationConfig:
+    enable: bool = False
+    host: str = '127.0.0.1'
+    port: int = 9464
+    poll_interval_ms: int = 1000
+
+
+@dataclass(frozen=True)
+class WatchdogConfig:
+    enable: bool = True
+    stall_timeout: float = 10
+    check_interval_ms: int = 1000
+    backoff_base: float = 1
+    backoff_max: float = 60
+    stable_seconds: float = 30
+    connect_timeout: float = 60
+
+
+@dataclass(frozen=True)
+class ControlConfig:
+    enable: bool = False
+    host: str = '127.0.0.1'
+    port: int = 9465
+
+
+@dataclass(frozen=True)
+class SupervisorConfig:
+    workers: int = 2
+    heartbeat_interval: float = 1
+    heartbeat_timeout: float = 15
+    restart_backoff_base: float = 1
+    restart_backoff_max: float = 30
+    stable_seconds: float = 60
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    level: str = 'INFO'
+    format: str = 'color'
+    levels: Dict[str, str] = field(default_factory=dict)
+    rate_limit_burst: int = 10
+    rate_limit_period: float = 60
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    enable: bool = False
+    path: str = 'events'
+    flush_interval: float = 1
+    buffer_rows: int = 65536
+    partition_seconds: float = 3600
+    retention_hours: float = 168
+
+
+@dataclass(frozen=True)
+class SubstitutionConfig:
+    profile: Optional[str] = None
+    width: int = 320
+    height: int = 240
+    framerate: int = 30
+    latency_us: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class StartupConfig:
+    staged: bool = False
+    source_timeout: float = 10
+    workers: int = 8
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    pgie: PgieConfig
+    tracker: TrackerConfig
+    nvdsanalytics: NvdsAnalyticsConfig
+    alarm: AlarmConfig
+    sources: List[str]
+    profile: str = 'display'
+    queues: Dict[str, Dict[str, Union[int, str]]] = field(default_factory=dict)
+    streammux: StreammuxConfig = field(default_factory=StreammuxConfig)
+    tiler: TilerConfig = field(default_factory=TilerConfig)
+    analytics: AnalyticsConfig = field(default_factory=AnalyticsConfig)
+    instrumentation: InstrumentationConfig = field(default_factory=InstrumentationConfig)
+    control: ControlConfig = field(default_factory=ControlConfig)
+    watchdog: WatchdogConfig = field(default_factory=WatchdogConfig)
+    supervisor: SupervisorConfig = field(default_factory=SupervisorConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    substitution: SubstitutionConfig = field(default_factory=SubstitutionConfig)
+    startup: StartupConfig = field(default_factory=StartupConfig)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AppConfig':
+        if not isinstance(data, dict) or not isinstance(data.get('pipeline'), dict):
+            raise ConfigurationError("Configuration must contain a 'pipeline' mapping")
+        config = build_section(cls, data['pipeline'], 'pipeline')
+        # A substituted tracker never reads its config file, so CPU-only runs don't need it on disk.
+        if 'nvtracker' not in SUBSTITUTIONS.get(config.substitution.profile, {}):
+            config = dataclasses.replace(config, tracker=_load_tracker_properties(config.tracker))
+        config.validate()
+        return config
+
+    @property
+    def max_sources(self) -> int:
+        return self.streammux.max_sources or len(self.sources)
+
+    def validate(self):
+        if self.profile not in PROFILES:
+            raise ConfigurationError(f"pipeline.profile must be one of {list(PROFILES)}, got '{self.profile}'")
+        if not self.sources:
+            raise ConfigurationError("pipeline.sources must list at least one URI")
+        if self.max_sources < len(self.sources):
+            raise ConfigurationError(f"pipeline.streammux.max-sources ({self.max_sources}) is smaller than "
+                                     f"the {len(self.sources)} configured sources")
+        if self.substitution.profile is not None and self.substitution.profile not in SUBSTITUTIONS:
+            raise ConfigurationError(f"pipeline.substitution.profile must be one of {list(SUBSTITUTIONS)}")
+        if self.logging.format not in LOG_FORMATS:
+            raise ConfigurationError(f"pipeline.logging.format must be one of {LOG_FORMATS}")
+        for name, level in {'level': self.logging.level, **self.logging.levels}.items():
+            if level not in LOG_LEVELS:
+                raise ConfigurationError(f"pipeline.logging level for '{name}' must be one of {LOG_LEVELS}")
+        if self.analytics.statistic not in STATISTICS:
+            raise ConfigurationError(f"pipeline.analytics.statistic must be one of {STATISTICS}")
+        if self.analytics.overflow_policy not in OVERFLOW_POLICIES:
+            raise ConfigurationError(f"pipeline.analytics.overflow-policy must be one of {OVERFLOW_POLICIES}")
+        if self.analytics.roi_anchor not in ANCHORS:
+            raise ConfigurationError(f"pipeline.analytics.roi-anchor must be one of {ANCHORS}")
+        if not 0 <= self.pgie.schedule.min_interval <= self.pgie.schedule.max_interval:
+            raise ConfigurationError("pipeline.pgie.schedule must satisfy 0 <= min-interval <= max-interval")
+        if not 0 <= self.analytics.percentile <= 100:
+            raise ConfigurationError("pipeline.analytics.percentile must be within [0, 100]")
+        for name in ('stall_timeout', 'check_interval_ms', 'backoff_base', 'backoff_max', 'connect_timeout'):
+            if getattr(self.watchdog, name) <= 0:
+                raise ConfigurationError(f"pipeline.watchdog.{name.replace('_', '-')} must be positive")
+        for name in ('workers', 'heartbeat_interval', 'heartbeat_timeout', 'restart_backoff_base'):
+            if getattr(self.supervisor, name) <= 0:
+                raise ConfigurationError(f"pipeline.supervisor.{name.replace('_', '-')} must be positive")
+        for name in ('source_timeout', 'workers'):
+            if getattr(self.startup, name) <= 0:
+                raise ConfigurationError(f"pipeline.startup.{name.replace('_', '-')} must be positive")
+        for name in ('flush_interval', 'buffer_rows', 'partition_seconds'):
+            if getattr(self.storage, name) <= 0:
+                raise ConfigurationError(f"pipeline.storage.{name.replace('_', '-')} must be positive")
+        for name in ('check_interval', 'window_seconds', 'history_size', 'queue_size', 'min_samples',
+                     'track_ttl', 'max_tracks', 'unique_window'):
+            if getattr(self.analytics, name) <= 0:
+                raise ConfigurationError(f"pipeline.analytics.{name.replace('_', '-')} must be positive")
+
+
+def diff_configs(old, new, prefix: str = '') -> List[str]:
+    changes = []
+    for f in dataclasses.fields(old):
+        old_value = getattr(old, f.name)
+        new_value = getattr(new, f.name)
+        path = f"{prefix}{f.name.replace('_', '-')}"
+        if dataclasses.is_dataclass(old_value):
+            changes.extend(diff_configs(old_value, new_value, f"{path}."))
+        elif old_value != new_value:
+            changes.append(path)
+    return changes
+
+
+def build_section(cls, data, path: str):
+    if not isinstance(data, dict):
+        raise ConfigurationError(f"{path} must be a mapping")
+    hints = get_type_hints(cls)
+    names = {f.name.replace('_', '-'): f for f in dataclasses.fields(cls) if f.name != 'properties'}
+    unknown = set(data) - set(names)
+    if unknown:
+        raise ConfigurationError(f"Unknown keys in {path}: {sorted(unknown)}")
+
+    values = {}
+    for key, f in names.items():
+        if key not in data:
+            if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+                raise ConfigurationError(f"Missing required key {path}.{key}")
+            continue
+        values[f.name] = _coerce(hints[f.name], data[key], f"{path}.{key}")
+    return cls(**values)
+
+
+def _coerce(hint, value, path: str):
+    if dataclasses.is_dataclass(hint):
+        return build_section(hint, value, path)
+    origin = get_origin(hint)
+    if origin is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        if value is None and len(args) < len(get_args(hint)):
+            return None
+        for arg in args:
+            try:
+                return _coerce(arg, value, path)
+            except ConfigurationError:
+                continue
+        raise ConfigurationError(f"{path} has invalid value {value!r}")
+    if origin is list:
+        if not isinstance(value, list):
+            raise ConfigurationError(f"{path} must be a list")
+        return [_coerce(get_args(hint)[0], item, f"{path}[{i}]") for i, item in enumerate(value)]
+    if origin is dict:
+        if not isinstance(value, dict):
+            raise ConfigurationError(f"{path} must be a mapping")
+        return {str(k): _coerce(get_args(hint)[1], v, f"{path}.{k}") for k, v in value.items()}
+    if hint is bool:
+        if isinstance(value, bool) or value in (0, 1):
+            return bool(value)
+    elif hint is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif hint is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    elif hint is str:
+        if isinstance(value, str):
+            return value
+    raise ConfigurationError(f"{path} must be of type {getattr(hint, '__name__', hint)}, got {value!r}")
+
+
+def _load_tracker_properties(tracker: TrackerConfig) -> TrackerConfig:
+    parser = configparser.ConfigParser()
+    if not parser.read(tracker.config_file) or 'tracker' not in parser:
+        raise ConfigurationError(f"Unable to read [tracker] section from {tracker.config_file}")
+    properties = {}
+    for key in parser['tracker']:
+        if key in TRACKER_PROPERTIES:
+            name, kind = TRACKER_PROPERTIES[key]
+            properties[name] = parser.getint('tracker', key) if kind is int else parser.get('tracker', key)
+    return dataclasses.replace(tracker, properties=properties)
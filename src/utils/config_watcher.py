@@ -0,0 +1,128 @@
+import os
+import logging
+import dataclasses
+import threading
+from pathlib import Path
+
+from ..utils.config_loader import ConfigLoader
+from ..utils.config_model import AppConfig, diff_configs
+from ..utils.exceptions import ConfigurationError
+
+LIVE_SETTINGS = (
+    'analytics.threshold-count',
+    'analytics.check-interval',
+    'analytics.window-seconds',
+    'analytics.statistic',
+    'analytics.percentile',
+    'analytics.min-samples',
+    'analytics.track-ttl',
+    'analytics.dwell-seconds',
+    'analytics.unique-window',
+    'analytics.unique-min',
+    'analytics.unique-max',
+    'nvdsanalytics.config-file',
+    'pgie.schedule.min-interval',
+    'pgie.schedule.max-interval',
+    'pgie.schedule.quiet-seconds',
+    'pgie.schedule.count-delta',
+    'pgie.schedule.new-tracks',
+    'alarm.',
+    'logging.',
+)
+
+
+def _mtime(path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _merge_changes(old, new, paths, prefix: str = ''):
+    # Copy of old with only the given diff_configs paths taken from new.
+    updates = {}
+    for f in dataclasses.fields(old):
+        path = f"{prefix}{f.name.replace('_', '-')}"
+        old_value, new_value = getattr(old, f.name), getattr(new, f.name)
+        if path in paths:
+            updates[f.name] = new_value
+        elif dataclasses.is_dataclass(old_value) and any(p.startswith(f"{path}.") for p in paths):
+            updates[f.name] = _merge_changes(old_value, new_value, paths, f"{path}.")
+    return dataclasses.replace(old, **updates) if updates else old
+
+
+class ConfigWatcher:
+    def __init__(self, config_path: Path, config: AppConfig, on_change, poll_interval: float = 2.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config_path = config_path
+        self.config = config
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._config_mtime = _mtime(config_path)
+        self._analytics_mtime = _mtime(config.nvdsanalytics.config_file)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.poll_interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.exception("Configuration watcher failed: %s", e)
+
+    def check(self):
+        config_mtime = _mtime(self.config_path)
+        analytics_mtime = _mtime(self.config.nvdsanalytics.config_file)
+        config_changed = config_mtime != self._config_mtime
+        analytics_changed = analytics_mtime != self._analytics_mtime
+        if not config_changed and not analytics_changed:
+            return
+        self._config_mtime = config_mtime
+
+        new_config = self.config
+        if config_changed:
+            try:
+                loaded = ConfigLoader.load(self.config_path)
+            except ConfigurationError as e:
+                self.logger.error("Ignoring invalid configuration change: %s", e)
+            else:
+                new_config = self._accept_live_changes(loaded)
+                analytics_changed = analytics_changed or (new_config.nvdsanalytics != self.config.nvdsanalytics)
+
+        self._analytics_mtime = _mtime(new_config.nvdsanalytics.config_file)
+        if new_config is self.config and not analytics_changed:
+            return
+        if analytics_changed:
+            self.logger.info("Reloading ROI configuration from %s", new_config.nvdsanalytics.config_file)
+        self.on_change(new_config, analytics_changed)
+        self.config = new_config
+
+    def _accept_live_changes(self, loaded: AppConfig) -> AppConfig:
+        # Restart-only changes are held back, but the live-safe part of the same edit still applies.
+        changes = diff_configs(self.config, loaded)
+        accepted = [change for change in changes if change.startswith(LIVE_SETTINGS)]
+        rejected = [change for change in changes if change not in accepted]
+        if rejected:
+            self.logger.error("Restart required, keeping current values for: %s", ', '.join(rejected))
+        if not accepted:
+            return self.config
+        if rejected:
+            merged = _merge_changes(self.config, loaded, accepted)
+            try:
+                merged.validate()
+            except ConfigurationError as e:
+                self.logger.error("Ignoring live configuration change: %s", e)
+                return self.config
+            loaded = merged
+        self.logger.info("Applying configuration change: %s", ', '.join(accepted))
+        return loaded
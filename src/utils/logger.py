@@ -1,21 +1,162 @@
+import json
+import time
+import atexit
 import logging
+import threading
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener
 from colorlog import ColoredFormatter
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FORMATS = ('color', 'plain', 'json')
+MAX_RATE_LIMIT_KEYS = 4096
+
+_listener = None
+_queue_handler = None
+_component_loggers = set()
+
+
+def _with_suppressed(record: logging.LogRecord, message: str) -> str:
+    suppressed = getattr(record, 'suppressed', 0)
+    return f"{message} ({suppressed} similar messages suppressed)" if suppressed else message
+
+
+class ColorFormatter(ColoredFormatter):
+    def __init__(self):
+        super().__init__(
+            "%(log_color)s" + LOG_FORMAT,
+            datefmt=None,
+            reset=True,
+            log_colors={
+                'DEBUG': 'cyan',
+                'INFO': 'green',
+                'WARNING': 'yellow',
+                'ERROR': 'red',
+                'CRITICAL': 'red,bg_white',
+            },
+            secondary_log_colors={},
+            style='%'
+        )
+
+    def format(self, record):
+        return _with_suppressed(record, super().format(record))
+
+
+class PlainFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(LOG_FORMAT)
+
+    def format(self, record):
+        return _with_suppressed(record, super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        if getattr(record, 'suppressed', 0):
+            payload['suppressed'] = record.suppressed
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload)
+
+
+class RateLimitFilter(logging.Filter):
+    # Allows `burst` records per message template and level every `period` seconds.
+    def __init__(self, burst: int = 10, period: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                if window is None and len(self._windows) >= MAX_RATE_LIMIT_KEYS:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _HandlerSwap:
+    __slots__ = ('handlers',)
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+
+
+class SwappableQueueListener(QueueListener):
+    # Output handler changes travel through the queue, so records enqueued before a reload keep their old format.
+    def handle(self, record):
+        if isinstance(record, _HandlerSwap):
+            self.handlers = record.handlers
+            return
+        super().handle(record)
+
+
+class AsyncQueueHandler(QueueHandler):
+    # The queue never leaves the process, so message formatting is left to the listener thread.
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(config=None):
+    global _listener, _queue_handler
+    level = getattr(config, 'level', 'DEBUG')
+    log_format = getattr(config, 'format', 'color')
+    levels = getattr(config, 'levels', {})
 
-def setup_logging():
     handler = logging.StreamHandler()
-    handler.setFormatter(ColoredFormatter(
-        "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt=None,
-        reset=True,
-        log_colors={
-            'DEBUG': 'cyan',
-            'INFO': 'green',
-            'WARNING': 'yellow',
-            'ERROR': 'red',
-            'CRITICAL': 'red,bg_white',
-        },
-        secondary_log_colors={},
-        style='%'
-    ))
-    logging.basicConfig(level=logging.DEBUG, handlers=[handler])
+    handler.setFormatter({'color': ColorFormatter, 'plain': PlainFormatter,
+                          'json': JsonFormatter}.get(log_format, ColorFormatter)())
+
+    filters = [RateLimitFilter(config.rate_limit_burst, config.rate_limit_period)] if config is not None else []
+    if _listener is None:
+        _queue_handler = AsyncQueueHandler(SimpleQueue())
+        _listener = SwappableQueueListener(_queue_handler.queue, handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        # Reconfigured while other threads are logging: keep the queue and listener so no record is dropped, and
+        # queue the handler swap behind everything already enqueued so those records are formatted as before.
+        _listener.queue.put_nowait(_HandlerSwap((handler,)))
+    _queue_handler.filters = filters
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+    for name in _component_loggers - set(levels):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    for name, component_level in levels.items():
+        logging.getLogger(name).setLevel(component_level)
+    _component_loggers.clear()
+    _component_loggers.update(levels)
+
+
+def shutdown_logging():
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
+
+
+atexit.register(shutdown_logging)